@@ -0,0 +1,408 @@
+import logging
+import typing
+
+import numpy as np
+
+import models
+from core import crossover, fitness_functions, mutation
+from core.fitness_functions import FConst
+from models import bit_population
+
+# metric -> stats key, same names as in GeneticAlgorithm stats
+FULL_METRICS = {"difference": "s", "intensity": "I", "reproduction": "RR", "loss_of_diversity": "Teta", "growth_rate": "GR"}
+NOISE_METRICS = {"reproduction": "RR", "loss_of_diversity": "Teta"}
+# metrics without min and max in stats
+AVG_ONLY_METRICS = {"growth_rate"}
+
+
+class BatchedGeneticAlgorithm:
+    """
+    Runs R independent GeneticAlgorithm runs (SUS selection on scaled fitness) in lockstep
+    on one (R, n, ceil(length / 8)) packed bit tensor. Fitness, scaling, selection and stats are computed
+    for all runs at once, random operators draw from the run's own random stream,
+    so a run doesn't depend on the other runs of the batch. Finished runs leave the batch,
+    stats of every run have the same keys as GeneticAlgorithm.stats.
+    Runs may differ in scale function and mutation rate, so variants of parameters can be swept
+    side by side on the same base population (see sweep()).
+    """
+
+    def __init__(
+            self, *,
+            base_populations: np.ndarray,
+            fitness_function: fitness_functions.FitnessFunction,
+            scale_function: typing.Union[models.Function, typing.Sequence[models.Function]],
+            optimal: str,
+            use_crossingover: bool,
+            crossover_type: str = "one_point",
+            stats_mode: str = "full",
+            sort_population: bool = True,
+            max_iteration: int = 10_000_000,
+            mutation_rate: typing.Union[None, float, typing.Sequence[float]] = None,
+            mutation_mode: str = "auto",
+            early_stopping: typing.Union[None, int] = None,
+            seed: typing.Union[None, int, typing.Sequence[np.random.SeedSequence]] = None,
+            base_fitness: typing.Union[None, np.ndarray] = None,
+    ):
+        """
+        :param base_populations: (R, n, length) tensor of 0/1 values, base population of each run
+        :param scale_function: Scale function of all runs or of each run
+        :param mutation_rate: Mutation rate of all runs or of each run, no mutation if None
+        :param seed: Seed of random streams of runs, each run gets an independent child stream, or seed of each run
+        :param base_fitness: (R, n) fitness of base populations if already known
+        """
+        runs, n, length = base_populations.shape
+
+        self._fitness_function: fitness_functions.FitnessFunction = fitness_function
+        if isinstance(scale_function, models.Function):
+            scale_function = [scale_function] * runs
+        # distinct scale functions, runs keep index of their one
+        self._scale_functions: typing.List[models.Function] = list({id(fn): fn for fn in scale_function}.values())
+        scale_ids = np.array([
+            next(i for i, fn in enumerate(self._scale_functions) if fn is run_fn) for run_fn in scale_function
+        ], dtype=np.int64)
+        self._optimal: str = optimal
+        self.use_crossingover: bool = use_crossingover
+        self._crossover_type: str = crossover_type
+        self._stats_mode: str = stats_mode
+        # as in GeneticAlgorithm, SUS sees population sorted by fitness unless sort is disabled
+        self._sort_population: bool = sort_population
+        self._max_iteration: int = max_iteration
+        self._mutation_rate: typing.Union[None, float, typing.Sequence[float]] = mutation_rate
+        self._early_stopping: int = early_stopping
+        self._iteration: int = 0
+
+        self._n: int = n
+        self._individual_len: int = length
+        if seed is None or isinstance(seed, int):
+            seed = np.random.SeedSequence(seed).spawn(runs)
+        self._rngs: typing.List[np.random.Generator] = [np.random.default_rng(run_seed) for run_seed in seed]
+        mutation_rates = np.broadcast_to(np.asarray(mutation_rate if mutation_rate is not None else 0.0), runs)
+        # mutation rate -> mutation mode
+        self._mutation_modes: typing.Dict[float, str] = {
+            rate: mutation.resolve_mode(mutation_mode, length, rate) for rate in set(mutation_rates.tolist())
+        }
+
+        genes = np.packbits(base_populations.astype(np.uint8), axis=-1)
+        if base_fitness is None:
+            base_fitness = self._evaluate(genes)
+        # ids of runs still in the batch, per-run state arrays are aligned with it
+        self._runs: np.ndarray = np.arange(runs)
+        self._state: typing.Dict[str, np.ndarray] = {
+            "genes": genes,
+            "fitness": np.array(base_fitness, dtype=np.float64),
+            "prev_genes": genes,
+            "prev_fitness": np.zeros((runs, n)),
+            "early_stopping": np.zeros(runs, dtype=np.int64),
+            "GR_early": np.full(runs, np.nan),
+            "GR_late": np.full(runs, np.nan),
+            "NI_GR_late": np.full(runs, -1, dtype=np.int64),
+            "scale": scale_ids,
+            "mutation_rate": mutation_rates.astype(np.float64),
+        }
+        for name in (FULL_METRICS if stats_mode != "noise" else NOISE_METRICS):
+            self._state.update({
+                f"{name}.sum": np.zeros(runs),
+                f"{name}.min": np.full(runs, np.inf),
+                f"{name}.argmin": np.full(runs, -1, dtype=np.int64),
+                f"{name}.max": np.full(runs, -np.inf),
+                f"{name}.argmax": np.full(runs, -1, dtype=np.int64),
+            })
+
+        self._stats: typing.List[typing.Dict[str, typing.Union[float, str]]] = [{} for _ in range(runs)]
+
+    @classmethod
+    def sweep(
+            cls, *,
+            base_populations: np.ndarray,
+            fitness_function: fitness_functions.FitnessFunction,
+            scale_functions: typing.Sequence[models.Function],
+            mutation_rates: typing.Sequence[typing.Union[None, float]] = (None,),
+            **kwargs
+    ) -> "BatchedGeneticAlgorithm":
+        """
+        Batch of runs of every (scale function, mutation rate) pair on each base population,
+        which is evaluated once for all its runs. Runs are ordered by scale function, then by mutation rate.
+        :param base_populations: (k, n, length) tensor of 0/1 values, every base population gets all variants,
+        runs of population i are i * variants ... (i + 1) * variants - 1
+        """
+        if None in mutation_rates and len(mutation_rates) > 1:
+            raise ValueError("Runs without mutation can't be swept together with mutated runs")
+
+        populations, n, length = base_populations.shape
+        variants = len(scale_functions) * len(mutation_rates)
+        base_fitness = fitness_function.evaluate_packed(
+            np.packbits(base_populations.reshape(-1, length).astype(np.uint8), axis=-1), length
+        ).reshape(populations, n)
+
+        return cls(
+            base_populations=np.repeat(base_populations, variants, axis=0),
+            fitness_function=fitness_function,
+            scale_function=[fn for _ in range(populations) for fn in scale_functions for _ in mutation_rates],
+            mutation_rate=None if mutation_rates[0] is None else [
+                rate for _ in range(populations * len(scale_functions)) for rate in mutation_rates
+            ],
+            base_fitness=np.repeat(base_fitness, variants, axis=0),
+            **kwargs
+        )
+
+    @property
+    def iteration(self) -> int:
+        return self._iteration
+
+    @property
+    def stats(self) -> typing.List[typing.Dict[str, typing.Union[float, str]]]:
+        """
+        Stats of every run, in order of base populations.
+        """
+        return self._stats
+
+    def _evaluate(self, genes: np.ndarray) -> np.ndarray:
+        """
+        Fitness of (..., n_bytes) packed rows, evaluated in one call.
+        """
+        flat = genes.reshape(-1, genes.shape[-1])
+        return self._fitness_function.evaluate_packed(flat, self._individual_len).reshape(genes.shape[:-1])
+
+    def _genotype_ids(self, genes: np.ndarray) -> np.ndarray:
+        """
+        Ids of genotypes of (R, k, n_bytes) packed rows: equal within a run for equal rows, distinct across runs.
+        """
+        runs, k, n_bytes = genes.shape
+        run_bytes = np.broadcast_to(
+            np.arange(runs, dtype=">u4").view(np.uint8).reshape(runs, 1, 4), (runs, k, 4)
+        )
+        rows = np.concatenate([run_bytes, genes], axis=2).reshape(runs * k, 4 + n_bytes)
+        _, ids = np.unique(bit_population.to_keys(rows), return_inverse=True)
+
+        return ids.reshape(runs, k)
+
+    @staticmethod
+    def _best_indices(fitness: np.ndarray) -> np.ndarray:
+        """
+        Index of the fittest individual of every run, the last one of equally fit.
+        """
+        return fitness.shape[1] - 1 - np.argmax(fitness[:, ::-1], axis=1)
+
+    def _record(self, name: str, values: np.ndarray):
+        state = self._state
+        state[f"{name}.sum"] += values
+
+        lower = values < state[f"{name}.min"]
+        state[f"{name}.min"] = np.where(lower, values, state[f"{name}.min"])
+        state[f"{name}.argmin"] = np.where(lower, self._iteration, state[f"{name}.argmin"])
+        higher = values > state[f"{name}.max"]
+        state[f"{name}.max"] = np.where(higher, values, state[f"{name}.max"])
+        state[f"{name}.argmax"] = np.where(higher, self._iteration, state[f"{name}.argmax"])
+
+    def _update_stats(self):
+        state = self._state
+        n = self._n
+        rows = np.arange(len(self._runs))
+
+        ids = self._genotype_ids(np.concatenate([state["prev_genes"], state["genes"]], axis=1))
+        previous_ids, current_ids = ids[:, :n], ids[:, n:]
+        present = np.zeros(ids.max() + 1, dtype=bool)
+        present[current_ids] = True
+
+        reproduction = present[previous_ids].sum(axis=1) / n
+        self._record("reproduction", reproduction)
+        self._record("loss_of_diversity", 1 - reproduction)
+
+        if self._stats_mode == "noise":
+            return
+
+        best_in_previous = previous_ids[rows, self._best_indices(state["prev_fitness"])]
+        num_of_best_in_previous = (previous_ids == best_in_previous[:, None]).sum(axis=1)
+        if self._sort_population:
+            # consecutive copies of the last (fittest) individual at the end of population
+            same = (current_ids == current_ids[:, -1:])[:, ::-1]
+            num_of_best = np.where(same.all(axis=1), n, np.argmin(same, axis=1))
+        else:
+            best = current_ids[rows, self._best_indices(state["fitness"])]
+            num_of_best = (current_ids == best[:, None]).sum(axis=1)
+
+        selection_difference = state["fitness"].mean(axis=1) - state["prev_fitness"].mean(axis=1)
+        self._record("difference", selection_difference)
+
+        std = state["prev_fitness"].std(axis=1)
+        selection_intensity = np.where(std == 0, 0, selection_difference / np.where(std == 0, 1, std))
+        self._record("intensity", selection_intensity)
+
+        growth_rate = np.where(num_of_best >= num_of_best_in_previous, num_of_best / num_of_best_in_previous, 0)
+        self._record("growth_rate", growth_rate)
+
+        if self._iteration == 1:
+            state["GR_early"] = growth_rate
+        late = np.isnan(state["GR_late"]) & (num_of_best >= n / 2)
+        state["GR_late"] = np.where(late, growth_rate, state["GR_late"])
+        state["NI_GR_late"] = np.where(late, self._iteration, state["NI_GR_late"])
+
+    def _run_stats(self, index: int, convergence_iteration: typing.Union[None, int]) -> dict:
+        state = self._state
+        stats = {}
+        records = self._iteration
+
+        if self._stats_mode == "noise":
+            stats["NI"] = int(convergence_iteration or -1)
+            stats["ConvTo"] = 0 if not state["genes"][index, 0].any() else 1
+            metrics = NOISE_METRICS
+        else:
+            if not np.isnan(state["GR_early"][index]):
+                stats["GR_early"] = float(state["GR_early"][index])
+            if not np.isnan(state["GR_late"][index]):
+                stats["GR_late"] = float(state["GR_late"][index])
+                stats["NI_GR_late"] = int(state["NI_GR_late"][index])
+
+            fitness = state["fitness"][index]
+            best = self._best_indices(fitness[None])[0]
+            stats["F_avg"] = float(fitness.mean())
+            stats["F_found"] = float(fitness[best])
+            stats["F"] = bit_population.to_genotypes(
+                bit_population.unpack(state["genes"][index, best:best + 1], self._individual_len)
+            )[0]
+            stats["NI"] = int(convergence_iteration or -1)
+            metrics = FULL_METRICS
+
+        for name, key in metrics.items():
+            stats[f"{key}_avg"] = float(state[f"{name}.sum"][index] / records) if records else np.nan
+            if not records or name in AVG_ONLY_METRICS:
+                continue
+            stats[f"{key}_min"] = float(state[f"{name}.min"][index])
+            stats[f"NI_{key}_min"] = int(state[f"{name}.argmin"][index])
+            stats[f"{key}_max"] = float(state[f"{name}.max"][index])
+            stats[f"NI_{key}_max"] = int(state[f"{name}.argmax"][index])
+
+        return stats
+
+    def _finish(self, finished: np.ndarray, convergence_iteration: typing.Union[None, int]):
+        """
+        Writes stats of finished runs and removes them from the batch.
+        """
+        for index in np.flatnonzero(finished):
+            self._stats[self._runs[index]] = self._run_stats(index, convergence_iteration)
+
+        keep = ~finished
+        self._runs = self._runs[keep]
+        self._state = {key: value[keep] for key, value in self._state.items()}
+
+    def _select(self, scaled_fitness: np.ndarray) -> np.ndarray:
+        """
+        Stochastic universal sampling in every run, same as selection_algorithms.sus_indices.
+        Cumulative scaled fitness of run r is normalized into [2r, 2r + 1], so one searchsorted serves all runs.
+        """
+        runs, n = scaled_fitness.shape
+        cumulative = np.cumsum(scaled_fitness, axis=1)
+        total = cumulative[:, -1]
+        zero = total <= 0
+
+        offsets = np.array([self._rngs[run].random() for run in self._runs])
+        normalized = cumulative / np.where(zero, 1, total)[:, None]
+        # all pointers of zero-total run are 0 and select its first individual
+        normalized[zero] = 1
+        pointers = (offsets[:, None] + np.arange(n)) / n
+        pointers[zero] = 0
+
+        rows = np.arange(runs)[:, None]
+        indices = np.searchsorted((normalized + 2 * rows).ravel(), (pointers + 2 * rows).ravel(), side="left")
+
+        return np.minimum(indices.reshape(runs, n) - n * rows, n - 1)
+
+    def _crossover(self, genes: np.ndarray) -> np.ndarray:
+        return np.stack([
+            crossover.crossover(run_genes, self._individual_len, self._crossover_type, self._rngs[run])[0]
+            for run, run_genes in zip(self._runs, genes)
+        ])
+
+    def _scale(self, fitness: np.ndarray) -> np.ndarray:
+        """
+        Scaled fitness, one vector call per scale function.
+        """
+        if len(self._scale_functions) == 1:
+            return self._scale_functions[0](fitness)
+
+        scaled = np.empty(fitness.shape)
+        for scale_id in np.unique(self._state["scale"]):
+            runs = self._state["scale"] == scale_id
+            scaled[runs] = self._scale_functions[scale_id](fitness[runs])
+
+        return scaled
+
+    def _mutate(self):
+        state = self._state
+
+        runs, rows, mutated = [], [], []
+        for index, run in enumerate(self._runs):
+            rate = float(state["mutation_rate"][index])
+            operator = mutation.PACKED_OPERATORS[self._mutation_modes[rate]]
+            changed, genes = operator(state["genes"][index], self._individual_len, rate, self._rngs[run])
+            runs.append(np.full(len(changed), index))
+            rows.append(changed)
+            mutated.append(genes)
+
+        runs, rows = np.concatenate(runs), np.concatenate(rows)
+        if not len(rows):
+            return
+
+        mutated = np.concatenate(mutated)
+        state["genes"][runs, rows] = mutated
+        state["fitness"][runs, rows] = self._evaluate(mutated)
+
+    def _sort(self):
+        state = self._state
+        order = np.argsort(state["fitness"], axis=1, kind="stable")
+        state["genes"] = np.take_along_axis(state["genes"], order[:, :, None], axis=1)
+        state["fitness"] = np.take_along_axis(state["fitness"], order, axis=1)
+
+    def _step(self):
+        if self._sort_population:
+            self._sort()
+        state = self._state
+
+        if self._iteration > 0:
+            self._update_stats()
+
+        if self._iteration == self._max_iteration:
+            logging.info(f"Max iteration exceeded, iterations - {self._iteration}")
+            self._finish(np.ones(len(self._runs), dtype=bool), None)
+            return
+
+        if self._mutation_rate is None:
+            self._finish((state["genes"] == state["genes"][:, :1]).all(axis=(1, 2)), self._iteration)
+            state = self._state
+            if not len(self._runs):
+                return
+
+        indices = self._select(self._scale(state["fitness"]))
+        genes = np.take_along_axis(state["genes"], indices[:, :, None], axis=1)
+        if self.use_crossingover:
+            genes = self._crossover(genes)
+            fitness = self._evaluate(genes)
+        else:
+            fitness = np.take_along_axis(state["fitness"], indices, axis=1)
+
+        state["prev_genes"], state["prev_fitness"] = state["genes"], state["fitness"]
+        state["genes"], state["fitness"] = genes, fitness
+
+        if self._mutation_rate is not None:
+            if isinstance(self._fitness_function, FConst):
+                ids = self._genotype_ids(genes)
+                distinct = (np.diff(np.sort(ids, axis=1), axis=1) != 0).sum(axis=1) + 1
+                self._finish(1.0 - distinct / self._n >= 0.99, None)
+                state = self._state
+
+            stagnation = state["fitness"].mean(axis=1) - state["prev_fitness"].mean(axis=1) <= 0.0001
+            state["early_stopping"] = np.where(stagnation, state["early_stopping"] + 1, 0)
+            self._finish(state["early_stopping"] == self._early_stopping, self._iteration)
+
+            if len(self._runs):
+                self._mutate()
+
+        self._iteration += 1
+
+    def fit(self):
+        logging.info(f"Starting fitting of {len(self._runs)} runs")
+
+        while len(self._runs):
+            self._step()
+
+        logging.info(f"Finished at Iteration #{self._iteration}")
@@ -0,0 +1,72 @@
+import typing
+
+import numpy as np
+
+from models import bit_population
+
+
+def sample_parents(n: int, rng: np.random.Generator) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Samples n pairs of distinct parents at once. Second parent is shifted from the first one
+    by a random non-zero offset, so it is uniform over the rest of population without rejection loop.
+    :param n: Number of individuals in population
+    :param rng: Random generator
+    :return: Indices of first and second parents
+    """
+    index_1 = rng.integers(0, n, n)
+    index_2 = (index_1 + rng.integers(1, n, n)) % n
+
+    return index_1, index_2
+
+
+def one_point_mask(n: int, length: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Child takes genes [0, point] from the first parent and the rest from the second one.
+    """
+    points = rng.integers(0, length, n)
+    return np.arange(length) <= points[:, None]
+
+
+def two_point_mask(n: int, length: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Child takes genes (point_1, point_2] from the second parent and the rest from the first one.
+    """
+    points = np.sort(rng.integers(0, length, (n, 2)), axis=1)
+    genes = np.arange(length)
+    return (genes <= points[:, :1]) | (genes > points[:, 1:])
+
+
+def uniform_mask(n: int, length: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Child takes each gene from either parent with equal probability.
+    """
+    return rng.random((n, length)) < 0.5
+
+
+MASKS = {
+    "one_point": one_point_mask,
+    "two_point": two_point_mask,
+    "uniform": uniform_mask,
+}
+
+
+def crossover(
+        genes: np.ndarray, length: int, kind: str, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Produces one child per individual from randomly paired parents.
+    :param genes: Packed (n, ceil(length / 8)) uint8 rows of parents
+    :param length: Length of each individual
+    :param kind: Crossover type, one of MASKS keys
+    :param rng: Random generator
+    :return: Packed rows of children, indices of first and second parents
+    """
+    if kind not in MASKS:
+        raise ValueError(f"Unknown crossover type: {kind}")
+
+    n = len(genes)
+    index_1, index_2 = sample_parents(n, rng)
+    mask = bit_population.pack(MASKS[kind](n, length, rng))
+
+    children = (genes[index_1] & mask) | (genes[index_2] & ~mask)
+    return children, index_1, index_2
@@ -1,56 +1,203 @@
 import datetime
-import functools
+import itertools
 import json
 import multiprocessing
 import pathlib
+import typing
+from dataclasses import dataclass, field
+from multiprocessing import shared_memory
 
-from core import evaluator_config, genetic_algorithm, scale_functions, selection_algorithms, utils
+import numpy as np
+
+import generators
+from models import bit_population
+from core import (
+    batched_genetic_algorithm, evaluator_config, fitness_table, genetic_algorithm, scale_functions,
+    payloads, selection_algorithms, utils, worker_pool,
+)
+
+
+@dataclass
+class EvaluationContext:
+    """
+    Everything workers need to run jobs of an evaluation, published once per evaluation.
+    """
+    evaluator: "Evaluator"
+    experiments: typing.List[typing.Tuple[int, int, int, evaluator_config.FitnessFunctionConfig]]
+    tables: typing.List[typing.Union[None, fitness_table.FitnessTable]]  # of each experiment
+    entropy: int  # seed of base populations, each epoch spawns its own from it
+
+
+@dataclass
+class ExperimentState:
+    """
+    Results of experiment's jobs collected in the main process until the last one finishes.
+    """
+    epochs: int
+    n: int
+    max_iteration: int
+    fitness_fn: evaluator_config.FitnessFunctionConfig
+    fn: typing.Any = None
+    table: fitness_table.FitnessTable = None
+    pending: int = 0
+    # epoch -> selection (-1 for all) -> run data of job
+    runs_data: typing.List[typing.Dict[int, dict]] = field(default_factory=list)
 
 
 class Evaluator:
-    def __init__(self, config: evaluator_config.EvaluatorConfig, cpu_count: int = None):
+    def __init__(
+            self, config: evaluator_config.EvaluatorConfig, cpu_count: int = None,
+            pool: worker_pool.WorkerPool = None,
+    ):
+        """
+        :param pool: Started or not yet started pool reused by every evaluation and closed by its owner,
+        otherwise each evaluation starts and closes its own pool
+        """
         self._config: evaluator_config.EvaluatorConfig = config
         self._writing_dir: pathlib.Path = pathlib.Path(f"./{self._config.writing_dir}/data")
         self._graphics_dir: pathlib.Path = pathlib.Path(f"./{self._config.writing_dir}/graphics")
 
+        # bad tabulation settings fail here, not after evaluation has started
+        for fitness_fn in self._config.fitness_fns:
+            if fitness_fn.tabulate:
+                fitness_fn.handler(**fitness_fn.values).check_tabulation(fitness_fn.length)
+
         self._writing_dir.mkdir(parents=True, exist_ok=True)
 
-        self._cpu_count = cpu_count or multiprocessing.cpu_count() - 1
+        self._cpu_count = cpu_count or (pool.processes if pool else multiprocessing.cpu_count() - 1)
+        self._pool: typing.Union[None, worker_pool.WorkerPool] = pool
+
+    def __getstate__(self):
+        # workers get the evaluator with every task, but not the pool itself
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
 
     def _write_report(self, name, data):
         with open(self._writing_dir / f'{name}.json', 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=4)
 
-    def run_epoch(
-            self, epoch: int, n: int, max_iteration: int, fitness_fn: evaluator_config.FitnessFunctionConfig
-    ):
-        fn = fitness_fn.handler(**fitness_fn.values)
-        stats_mode = fitness_fn.stats_mode
-        length = fitness_fn.length
+    @staticmethod
+    def _mutation_variants(
+            n: int, fitness_fn: evaluator_config.FitnessFunctionConfig
+    ) -> typing.List[typing.Tuple[str, typing.Union[None, float]]]:
+        """
+        (run name suffix, mutation rate scaled to n) of every mutation rate of fitness function,
+        a single rate keeps run names unchanged.
+        """
+        rates = fitness_fn.mutation_rates or [fitness_fn.mutation_rate]
+        variants = []
 
-        optimal = True
-        if fitness_fn.mutation_rate is not None and epoch >= 5:  # epochs from 0
-            optimal = False
+        for rate in rates:
+            suffix = f"$mutation_rate={rate}" if len(rates) > 1 else ""
+            variants.append((suffix, rate / (n / 100) if rate else rate))
+
+        return variants
 
-        generator = fitness_fn.generator(
+    @staticmethod
+    def _generator(
+            n: int, fitness_fn: evaluator_config.FitnessFunctionConfig, fn,
+            seed: typing.Union[None, np.random.SeedSequence] = None,
+    ) -> generators.BaseGenerator:
+        return fitness_fn.generator(
             n=n,
-            length=length,
+            length=fitness_fn.length,
             optimal=fitness_fn.optimal,
             generate_optimal=True,
             fitness_fn=fn,
             low_range=fitness_fn.values.get("low"),
             high_range=fitness_fn.values.get("high"),
+            rng=np.random.default_rng(seed),
         )
+
+    @staticmethod
+    def _epoch_seed(entropy: int, experiment: int, epoch: int) -> np.random.SeedSequence:
+        return np.random.SeedSequence(entropy, spawn_key=(experiment, epoch))
+
+    def _run_seeds(
+            self, seed: typing.Union[None, np.random.SeedSequence],
+            selection_fns: typing.List[evaluator_config.SelectionFunctionConfig], n: int,
+            fitness_fn: evaluator_config.FitnessFunctionConfig,
+    ) -> typing.List[typing.Union[None, np.random.SeedSequence]]:
+        """
+        Seeds of GA runs of an epoch in order of _run_names: children of epoch's seed keyed by run's place
+        among all runs of the epoch, so they don't depend on how runs are split into jobs. None if seed is None.
+        """
+        variants = len(self._mutation_variants(n, fitness_fn))
+        if seed is None:
+            return [None] * (len(selection_fns) * variants)
+
+        return [
+            np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key + (
+                self._config.selection_fns.index(selection_fn) * variants + variant,
+            ))
+            for selection_fn in selection_fns for variant in range(variants)
+        ]
+
+    def run_base_job(self, job: payloads.Job, context: "EvaluationContext") -> np.ndarray:
+        """
+        Draws and evaluates base populations of job's epochs from the same seeds as other jobs draw their own,
+        so results don't depend on where populations are generated.
+        :return: (epochs, n) array of payloads.population_dtype
+        """
+        _, n, _, fitness_fn = context.experiments[job.experiment]
+        fn = fitness_fn.handler(**fitness_fn.values, cache_size=fitness_fn.cache_size)
+        fn.use_table(context.tables[job.experiment])
+        populations = np.empty((job.stop - job.start, n), dtype=payloads.population_dtype(fitness_fn.length))
+
+        for index, epoch in enumerate(range(job.start, job.stop)):
+            seed = self._epoch_seed(context.entropy, job.experiment, epoch)
+            genes = bit_population.pack(self._generator(n, fitness_fn, fn, seed).generate_bits())
+            populations["genes"][index] = genes
+            populations["fitness"][index] = fn.evaluate_packed(genes, fitness_fn.length)
+
+        return populations
+
+    def run_epoch(
+            self, epoch: int, n: int, max_iteration: int, fitness_fn: evaluator_config.FitnessFunctionConfig,
+            table: fitness_table.FitnessTable = None,
+            selection_fns: typing.List[evaluator_config.SelectionFunctionConfig] = None,
+            seed: typing.Union[None, np.random.SeedSequence] = None,
+            base_population: np.ndarray = None, base_fitness: np.ndarray = None,
+    ):
+        """
+        :param selection_fns: Selection functions to run, all of config by default
+        :param seed: Seed of epoch: base population and GA runs draw from it, random by default
+        :param base_population: (n, length) matrix of 0/1 values drawn in advance from seed
+        (sweep mode always draws its own)
+        :param base_fitness: Fitness of base_population if already known
+        """
+        if self._config.sweep:
+            return self.run_epochs_batched([epoch], n, max_iteration, fitness_fn, table, selection_fns, [seed])[0]
+
+        fn = fitness_fn.handler(**fitness_fn.values, cache_size=fitness_fn.cache_size)
+        fn.use_table(table)
+        stats_mode = fitness_fn.stats_mode
+
+        optimal = True
+        if fitness_fn.mutation_rate is not None and epoch >= 5:  # epochs from 0
+            optimal = False
+
         run_data = {}
 
-        population = generator.generate_population()
+        if base_population is not None:
+            population = base_population
+        elif self._config.backend == "numpy":
+            population = self._generator(n, fitness_fn, fn, seed).generate_bits()
+        else:
+            population = self._generator(n, fitness_fn, fn, seed).generate_population()
+
+        selection_fns = selection_fns or self._config.selection_fns
+        run_seeds = self._run_seeds(seed, selection_fns, n, fitness_fn)
 
-        for selection_fn in self._config.selection_fns:
+        for (selection_fn, (suffix, mutation_rate)), run_seed in zip(
+                itertools.product(selection_fns, self._mutation_variants(n, fitness_fn)), run_seeds
+        ):
             print(
                 f"Fitting GA: epoch={epoch}, n={n}, fitness={fitness_fn.name}, "
-                f"linearScaling(A={selection_fn.a}, B={selection_fn.b})"
+                f"linearScaling(A={selection_fn.a}, B={selection_fn.b}), mutation_rate={mutation_rate}"
             )
-            selection_fn_name = f"a={selection_fn.a}$b={selection_fn.b}"
+            selection_fn_name = f"a={selection_fn.a}$b={selection_fn.b}{suffix}"
 
             if epoch < 5:
                 graphics_dir = self._graphics_dir / fitness_fn.name / str(n) / selection_fn_name / str(epoch)
@@ -59,11 +206,6 @@ class Evaluator:
             else:
                 graphics_dir_str = ''
 
-            if fitness_fn.mutation_rate:
-                mutation_rate = fitness_fn.mutation_rate / (n / 100)
-            else:
-                mutation_rate = fitness_fn.mutation_rate
-
             algo = genetic_algorithm.GeneticAlgorithm(
                 base_population=population,
                 fitness_function=fn,
@@ -71,14 +213,21 @@ class Evaluator:
                 selection_algo=selection_algorithms.my_sus,
                 optimal=fitness_fn.optimal,
                 stats_mode=stats_mode,
+                sort_population=fitness_fn.sort_population,
                 use_crossingover=fitness_fn.use_crossingover,
+                crossover_type=fitness_fn.crossover_type,
                 modified_selection_algo=False,
                 max_iteration=max_iteration,
                 mutation_rate=mutation_rate,
+                mutation_mode=fitness_fn.mutation_mode,
                 early_stopping=fitness_fn.early_stopping,
                 draw_step=None,
                 draw_total_steps=False,
-                graphics_dir=graphics_dir_str
+                graphics_dir=graphics_dir_str,
+                history_size=None if graphics_dir_str else 0,  # per-generation history is read only by graphics
+                backend=self._config.backend,
+                seed=run_seed,
+                base_fitness=base_fitness,
             )
             algo.fit()
 
@@ -86,51 +235,335 @@ class Evaluator:
 
         return run_data
 
-    def evaluate_experiment(
-            self, epochs: int, n: int, max_iteration: int, fitness_fn: evaluator_config.FitnessFunctionConfig
+    def run_epochs_batched(
+            self, epochs: typing.Sequence[int], n: int, max_iteration: int,
+            fitness_fn: evaluator_config.FitnessFunctionConfig, table: fitness_table.FitnessTable = None,
+            selection_fns: typing.List[evaluator_config.SelectionFunctionConfig] = None,
+            seeds: typing.Sequence[typing.Union[None, np.random.SeedSequence]] = None,
     ):
-        fn = fitness_fn.handler(**fitness_fn.values)
-        stats_mode = fitness_fn.stats_mode
-        length = fitness_fn.length
+        """
+        Same as run_epoch for each of given epochs, but runs of all epochs, selection functions
+        and mutation rates advance together in one BatchedGeneticAlgorithm.
+        Each base population is evaluated once for all its runs. Graphics are not drawn.
+        """
+        fn = fitness_fn.handler(**fitness_fn.values, cache_size=fitness_fn.cache_size)
+        fn.use_table(table)
 
-        report_data = []
+        seeds = seeds or [None] * len(epochs)
+        # generator draws its distribution once, so every base population gets its own one
+        populations = np.stack([self._generator(n, fitness_fn, fn, seed).generate_bits() for seed in seeds])
+        mutation_variants = self._mutation_variants(n, fitness_fn)
+        selection_fns = selection_fns or self._config.selection_fns
+        print(
+            f"Fitting batched GA: epochs={epochs[0]}..{epochs[-1]}, n={n}, fitness={fitness_fn.name}, "
+            f"{len(selection_fns)} selection functions, {len(mutation_variants)} mutation rates"
+        )
 
-        with multiprocessing.Pool(self._cpu_count) as p:
-            for result in p.imap(
-                functools.partial(
-                        self.run_epoch, n=n, max_iteration=max_iteration, fitness_fn=fitness_fn
-                ), range(epochs)
-            ):
-                report_data.append(result)
+        algo = batched_genetic_algorithm.BatchedGeneticAlgorithm.sweep(
+            base_populations=populations,
+            fitness_function=fn,
+            scale_functions=[scale_functions.LinearScaling(fn_config.a, fn_config.b) for fn_config in selection_fns],
+            mutation_rates=[mutation_rate for _, mutation_rate in mutation_variants],
+            optimal=fitness_fn.optimal,
+            use_crossingover=fitness_fn.use_crossingover,
+            crossover_type=fitness_fn.crossover_type,
+            stats_mode=fitness_fn.stats_mode,
+            sort_population=fitness_fn.sort_population,
+            max_iteration=max_iteration,
+            mutation_mode=fitness_fn.mutation_mode,
+            early_stopping=fitness_fn.early_stopping,
+            # runs of each epoch draw from its seed, same as run_epoch
+            seed=[run_seed for seed in seeds for run_seed in self._run_seeds(seed, selection_fns, n, fitness_fn)],
+        )
+        algo.fit()
+
+        # runs are ordered by base population, then by selection function, then by mutation rate
+        names = self._run_names(selection_fns, n, fitness_fn)
+        runs_data = []
+        for epoch_index in range(len(epochs)):
+            stats = algo.stats[epoch_index * len(names):(epoch_index + 1) * len(names)]
+            runs_data.append(dict(zip(names, stats)))
+
+        return runs_data
+
+    @staticmethod
+    def _run_names(
+            selection_fns: typing.List[evaluator_config.SelectionFunctionConfig], n: int,
+            fitness_fn: evaluator_config.FitnessFunctionConfig,
+    ) -> typing.List[str]:
+        """
+        Names of runs of an epoch in order of run data, as named by run_epoch and run_epochs_batched.
+        """
+        mutation_variants = Evaluator._mutation_variants(n, fitness_fn)
+
+        return [
+            f"a={selection_fn.a}$b={selection_fn.b}{suffix}"
+            for selection_fn, (suffix, _) in itertools.product(selection_fns, mutation_variants)
+        ]
+
+    def _job_selection_fns(self, job: payloads.Job) -> typing.List[evaluator_config.SelectionFunctionConfig]:
+        if job.selection < 0:
+            return self._config.selection_fns
+
+        return [self._config.selection_fns[job.selection]]
+
+    def run_job(self, job: payloads.Job, context: "EvaluationContext") -> np.ndarray:
+        """
+        Runs one job of the work queue.
+        :return: Stats records of its runs, ordered by epoch, then as _run_names
+        """
+        _, n, max_iteration, fitness_fn = context.experiments[job.experiment]
+        kwargs = dict(
+            n=n, max_iteration=max_iteration, fitness_fn=fitness_fn, table=context.tables[job.experiment],
+            selection_fns=self._job_selection_fns(job),
+        )
+        epochs = list(range(job.start, job.stop))
+        seeds = [self._epoch_seed(context.entropy, job.experiment, epoch) for epoch in epochs]
+
+        if self._config.batched:
+            runs_data = self.run_epochs_batched(epochs, seeds=seeds, **kwargs)
+        elif self._shares_epochs():
+            # only rows of job's epochs are copied out of the experiment's shared base populations
+            populations = payloads.read_rows(
+                payloads.base_name(job.context, job.experiment), (context.experiments[job.experiment][0], n),
+                payloads.population_dtype(fitness_fn.length), job.start, job.stop,
+            )
+            runs_data = [
+                self.run_epoch(
+                    epoch, seed=seed, base_population=bit_population.unpack(population["genes"], fitness_fn.length),
+                    base_fitness=population["fitness"], **kwargs
+                )
+                for epoch, seed, population in zip(epochs, seeds, populations)
+            ]
+        else:
+            runs_data = [self.run_epoch(epoch, seed=seed, **kwargs) for epoch, seed in zip(epochs, seeds)]
+
+        return payloads.to_records(
+            [stats for run_data in runs_data for stats in run_data.values()], fitness_fn.length
+        )
+
+    def _jobs(self, context_name: str, experiment: int, state: ExperimentState) -> typing.List[payloads.Job]:
+        """
+        Splits experiment into jobs: chunks of epochs in batched mode, epochs in sweep mode,
+        (epoch, selection function) pairs otherwise. Jobs of the same epoch get its base population
+        drawn and evaluated once by a job of its own (see _shares_epochs and run_base_job).
+        """
+        if self._config.batched:
+            # one chunk of consecutive epochs per worker
+            epoch_groups = [
+                (int(chunk[0]), int(chunk[-1]) + 1)
+                for chunk in np.array_split(np.arange(state.epochs), self._cpu_count) if len(chunk)
+            ]
+        else:
+            epoch_groups = [(epoch, epoch + 1) for epoch in range(state.epochs)]
+
+        if self._shares_epochs():
+            selections = list(range(len(self._config.selection_fns)))
+        else:
+            selections = [-1]
+
+        return [
+            payloads.Job(context_name, experiment, start, stop, selection)
+            for start, stop in epoch_groups for selection in selections
+        ]
+
+    def _shares_epochs(self) -> bool:
+        """
+        Whether an epoch is split into several jobs, one per selection function.
+        """
+        return not (self._config.batched or self._config.sweep) and len(self._config.selection_fns) > 1
+
+    def _collect(self, state: ExperimentState, job: payloads.Job, records: np.ndarray):
+        names = self._run_names(self._job_selection_fns(job), state.n, state.fitness_fn)
+        runs_stats = payloads.from_records(records, state.fitness_fn.length)
+
+        for epoch_index, epoch in enumerate(range(job.start, job.stop)):
+            stats = runs_stats[epoch_index * len(names):(epoch_index + 1) * len(names)]
+            state.runs_data[epoch][job.selection] = dict(zip(names, stats))
+
+    def _write_experiment(self, state: ExperimentState):
+        stats_mode = state.fitness_fn.stats_mode
+        # jobs finish in any order, epochs and selection functions are put back in order
+        report_data = [
+            {name: stats for _, run_data in sorted(parts.items()) for name, stats in run_data.items()}
+            for parts in state.runs_data
+        ]
+        aggregator = utils.RunsAggregator(stats_mode, state.fitness_fn.optimal, state.fn)
+        for run_data in report_data:
+            aggregator.add(run_data)
 
         report_meta = {
-            "n": n,
-            "epochs": epochs,
-            "max_iteration": max_iteration,
+            "n": state.n,
+            "epochs": state.epochs,
+            "max_iteration": state.max_iteration,
             "selection_fns": {
                 "a": list({fn.a for fn in self._config.selection_fns}),
                 "b": list({fn.b for fn in self._config.selection_fns})
             },
-            "length": length,
-            "fitness_fn": fitness_fn.name,
-            "fitness_fn_values": fitness_fn.values,
+            "length": state.fitness_fn.length,
+            "fitness_fn": state.fitness_fn.name,
+            "fitness_fn_values": state.fitness_fn.values,
             "stats_mode": stats_mode,
             "data": report_data,
-            "total_data": utils.aggregate_runs_data(report_data, stats_mode, fitness_fn.optimal, fn)
+            "total_data": aggregator.result()
         }
         current_time = datetime.datetime.now().strftime("%d-%m-%yT%H.%M.%S")
-        name = f"data${current_time}${n}${fitness_fn.name}${epochs}"
+        name = f"data${current_time}${state.n}${state.fitness_fn.name}${state.epochs}"
         self._write_report(name, report_meta)
 
         print(f"Report successfully generated: {name}.json")
 
+    @staticmethod
+    def _release(state: ExperimentState):
+        if state.table is not None:
+            state.table.release()
+            state.fn.use_table(None)
+            state.table = None
+        # written into report, not needed anymore
+        state.runs_data = []
+
+    def evaluate_experiments(
+            self, experiments: typing.Sequence[typing.Tuple[int, int, int, evaluator_config.FitnessFunctionConfig]]
+    ):
+        """
+        Runs jobs of all experiments through one queue of one pool, so workers don't wait for the slowest
+        epoch of an experiment. Report of an experiment is written as soon as its last job finishes.
+        Evaluator, experiments and fitness tables are published once in shared memory,
+        tasks carry only ids and results come back as packed stats records.
+        :param experiments: (epochs, n, max_iteration, fitness_fn) of each experiment
+        """
+        states = [
+            ExperimentState(epochs=epochs, n=n, max_iteration=max_iteration, fitness_fn=fitness_fn)
+            for epochs, n, max_iteration, fitness_fn in experiments
+        ]
+        pool = self._pool or worker_pool.WorkerPool(
+            self._cpu_count, self._config.start_method, self._config.threads_per_worker
+        )
+        context_shm = None
+        base_shms = []
+        results = None
+        unreceived = set()
+
+        try:
+            for state in states:
+                state.fn = state.fitness_fn.handler(**state.fitness_fn.values, cache_size=state.fitness_fn.cache_size)
+                # workers attach to the shared table instead of recomputing or copying it
+                if state.fitness_fn.tabulate:
+                    state.table = state.fn.tabulate(state.fitness_fn.length, shared=True)
+                state.runs_data = [{} for _ in range(state.epochs)]
+
+            context_shm = payloads.publish(EvaluationContext(
+                evaluator=self,
+                experiments=list(experiments),
+                tables=[state.table for state in states],
+                entropy=np.random.SeedSequence().entropy,
+            ))
+
+            if self._shares_epochs():
+                # base populations are drawn in parallel before jobs of the epochs that share them
+                base_jobs = []
+                for experiment, state in enumerate(states):
+                    dtype = payloads.population_dtype(state.fitness_fn.length)
+                    base_shms.append(shared_memory.SharedMemory(
+                        name=payloads.base_name(context_shm.name, experiment), create=True,
+                        size=state.epochs * state.n * dtype.itemsize,
+                    ))
+                    base_jobs.extend(
+                        payloads.Job(context_shm.name, experiment, epoch, epoch + 1, -1)
+                        for epoch in range(state.epochs)
+                    )
+
+                unreceived.update(base_jobs)
+                results = pool.imap_unordered(run_base_job, base_jobs)
+                for job, payload in results:
+                    unreceived.discard(job)
+                    state = states[job.experiment]
+                    np.ndarray(
+                        (state.epochs, state.n), dtype=payloads.population_dtype(state.fitness_fn.length),
+                        buffer=base_shms[job.experiment].buf,
+                    )[job.start:job.stop] = payloads.receive_array(payload)
+
+            jobs = []
+            for experiment, state in enumerate(states):
+                experiment_jobs = self._jobs(context_shm.name, experiment, state)
+                state.pending = len(experiment_jobs)
+                jobs.extend(experiment_jobs)
+
+            unreceived.update(jobs)
+            results = pool.imap_unordered(run_job, jobs)
+            for job, payload in results:
+                unreceived.discard(job)
+                state = states[job.experiment]
+                self._collect(state, job, payloads.receive_array(payload))
+
+                state.pending -= 1
+                if not state.pending:
+                    self._write_experiment(state)
+                    self._release(state)
+        except BaseException:
+            # queued jobs are useless now: own pool doesn't wait for them, shared one keeps running,
+            # so its jobs finish before their context and tables are removed
+            if pool is not self._pool:
+                pool.terminate()
+            elif results is not None:
+                self._drain(results)
+            for job in unreceived:
+                payloads.discard_array(payloads.result_name(job))
+            raise
+        finally:
+            if pool is not self._pool:
+                pool.close()
+            for shm in base_shms:
+                shm.close()
+                shm.unlink()
+            if context_shm is not None:
+                context_shm.close()
+                context_shm.unlink()
+            for state in states:
+                self._release(state)
+
+    @staticmethod
+    def _drain(results: typing.Iterator):
+        """
+        Waits for the remaining results, failed jobs included.
+        """
+        while True:
+            try:
+                next(results)
+            except StopIteration:
+                return
+            except Exception:
+                continue
+
+    def evaluate_experiment(
+            self, epochs: int, n: int, max_iteration: int, fitness_fn: evaluator_config.FitnessFunctionConfig
+    ):
+        self.evaluate_experiments([(epochs, n, max_iteration, fitness_fn)])
+
     def evaluate(self):
         epochs = self._config.epochs
         max_iteration = self._config.max_iteration
 
-        for n in self._config.n_vals:
-            for fitness_fn in self._config.fitness_fns:
-                self.evaluate_experiment(epochs, n, max_iteration, fitness_fn)
+        self.evaluate_experiments([
+            (epochs, n, max_iteration, fitness_fn)
+            for n in self._config.n_vals for fitness_fn in self._config.fitness_fns
+        ])
+
+
+def run_base_job(job: payloads.Job) -> typing.Tuple[payloads.Job, typing.Union[np.ndarray, payloads.SharedArray]]:
+    """
+    Entry point of pool workers for base populations shared by several jobs.
+    """
+    context: EvaluationContext = payloads.resolve(job.context)
+    return job, payloads.send_array(context.evaluator.run_base_job(job, context), payloads.result_name(job))
+
+
+def run_job(job: payloads.Job) -> typing.Tuple[payloads.Job, typing.Union[np.ndarray, payloads.SharedArray]]:
+    """
+    Entry point of pool workers: resolves the job against its published context.
+    """
+    context: EvaluationContext = payloads.resolve(job.context)
+    return job, payloads.send_array(context.evaluator.run_job(job, context), payloads.result_name(job))
 
 
 if __name__ == "__main__":
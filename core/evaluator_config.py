@@ -28,6 +28,9 @@ AB_VALUES = [(1,1), (1,-1), (2,1), (2,-1)]
 
 MUTATION_RATE=0.00001
 
+# "object" - list of models.Individual, "numpy" - packed bit matrix (models.BitPopulation)
+BACKEND_DEFAULT = "object"
+
 @dataclass
 class SelectionFunctionConfig:
     a: int
@@ -44,8 +47,14 @@ class FitnessFunctionConfig:
     optimal: str
     values: dict = field(default_factory=dict)
     mutation_rate: float = None
+    mutation_rates: List[float] = None  # several mutation rates run side by side, mutation_rate is used if None
+    mutation_mode: str = "auto"  # "dense", "sparse" or "auto" (see core.mutation.resolve_mode)
     early_stopping: int = None
     use_crossingover: bool = False
+    tabulate: bool = False  # precompute fitness of whole m-bit domain in shared memory (real-valued only)
+    cache_size: int = None  # max number of memoized fitness values, no memoization if None
+    crossover_type: str = "one_point"  # "one_point", "two_point" or "uniform" (see core.crossover.MASKS)
+    sort_population: bool = True  # False keeps population unsorted, best individual is found by argmax
 
 
 
@@ -57,6 +66,11 @@ class EvaluatorConfig:
     selection_fns: List[SelectionFunctionConfig]
     fitness_fns: List[FitnessFunctionConfig]
     writing_dir: str
+    backend: str = BACKEND_DEFAULT
+    batched: bool = False  # run epochs of a worker together in BatchedGeneticAlgorithm, without graphics
+    sweep: bool = False  # run all selection functions and mutation rates of epoch together, without graphics
+    start_method: str = None  # "fork", "spawn" or "forkserver" (modules are preloaded once), platform default if None
+    threads_per_worker: int = 1  # limit of native (BLAS, OpenMP) threads in each worker, no limit if None
 
 
 EARLY_STOPPING = 10
@@ -332,16 +346,25 @@ def get_config(
         epochs=None,
         max_iteration=None,
         writing_dir=None,
+        backend=None,
+        batched=False,
+        sweep=False,
+        start_method=None,
+        threads_per_worker=1,
 ):
     epochs = epochs or EPOCHS_DEFAULT
     max_iteration = max_iteration or MAX_ITERATION_DEFAULT
     n_vals = n_vals or N_DEFAULT_VALUES
     writing_dir = writing_dir or WRITING_DIR_DEFAULT
+    backend = backend or BACKEND_DEFAULT
 
     selection_fns = selection_fns or get_selection_fns_config()
     fitness_fns = get_fitness_fns_config(fitness_fns)
 
-    return EvaluatorConfig(epochs, n_vals, max_iteration, selection_fns, fitness_fns, writing_dir)
+    return EvaluatorConfig(
+        epochs, n_vals, max_iteration, selection_fns, fitness_fns, writing_dir, backend, batched, sweep,
+        start_method, threads_per_worker,
+    )
 
 
 if __name__ == "__main__":
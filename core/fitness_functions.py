@@ -1,15 +1,197 @@
 import abc
+import collections
 import math
 import random
-import re
+import typing
+
+import numpy as np
 
 import models
 from core import utils
+from core.fitness_table import FitnessTable, MAX_TABULATED_LENGTH
+from models import bit_population
+
+
+class FitnessCache:
+    """
+    Bounded LRU memoization of fitness values by genotype key: packed genotype row (see bit_population.to_keys),
+    so a cache serves genotypes of one length.
+    """
+
+    def __init__(self, size: int):
+        self._size: int = size
+        self._values: collections.OrderedDict = collections.OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, key: typing.Hashable) -> typing.Union[float, None]:
+        value = self._values.get(key)
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._values.move_to_end(key)
+
+        return value
+
+    def put(self, key: typing.Hashable, value: float):
+        self._values[key] = value
+        self._values.move_to_end(key)
+
+        if len(self._values) > self._size:
+            self._values.popitem(last=False)
+
+    def lookup(self, keys: typing.List[typing.Hashable]) -> typing.Tuple[np.ndarray, np.ndarray]:
+        """
+        Batch lookup.
+        :return: Values vector (NaN for misses) and indices of missed keys
+        """
+        values = np.empty(len(keys), dtype=np.float64)
+        missed = []
+
+        for index, key in enumerate(keys):
+            value = self.get(key)
+            if value is None:
+                missed.append(index)
+            else:
+                values[index] = value
+
+        return values, np.array(missed, dtype=np.int64)
+
+    def store(self, keys: typing.Iterable[typing.Hashable], values: typing.Iterable[float]):
+        for key, value in zip(keys, values):
+            self.put(key, value)
+
+    def info(self) -> typing.Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._values), "max_size": self._size}
+
+    def __len__(self) -> int:
+        return len(self._values)
 
 
 class FitnessFunction(models.Function):
-    def __init__(self, **kwargs):
-        pass
+    def __init__(self, cache_size: typing.Union[int, None] = None, **kwargs):
+        """
+        :param cache_size: Max number of memoized genotypes, memoization is off if None
+        """
+        self._cache: typing.Union[FitnessCache, None] = FitnessCache(cache_size) if cache_size else None
+        self._table: typing.Union[FitnessTable, None] = None
+
+    @property
+    def cache(self) -> typing.Union[FitnessCache, None]:
+        return self._cache
+
+    @property
+    def table(self) -> typing.Union[FitnessTable, None]:
+        return self._table
+
+    @property
+    def domain_length(self) -> typing.Union[int, None]:
+        """
+        Length of genotypes whose fitness can be tabulated, None if fitness can't be tabulated.
+        """
+        return None
+
+    def check_tabulation(self, length: int):
+        """
+        Raises ValueError if fitness of length-bit genotypes can't be tabulated.
+        """
+        if self.domain_length is None:
+            raise ValueError(f"Can't tabulate {self.name}, only functions of encoded real argument can be tabulated")
+        if length != self.domain_length:
+            raise ValueError(
+                f"Can't tabulate {self.name} for {length}-bit genotypes, its domain is {self.domain_length}-bit"
+            )
+        if length > MAX_TABULATED_LENGTH:
+            raise ValueError(f"Can't tabulate {length}-bit domain, max length is {MAX_TABULATED_LENGTH}")
+
+    def tabulate(self, length: int, shared: bool = False) -> FitnessTable:
+        """
+        Precomputes fitness of the whole 2^length genotype domain, evaluation becomes a table gather.
+        :param length: Length of genotype
+        :param shared: Place table in shared memory (see FitnessTable)
+        """
+        self.check_tabulation(length)
+
+        values = np.asarray(self._domain_values(np.arange(2 ** length)), dtype=np.float64)
+        self._table = FitnessTable.shared(values) if shared else FitnessTable(values)
+
+        return self._table
+
+    def use_table(self, table: typing.Union[FitnessTable, None]):
+        self._table = table
+
+    def _domain_values(self, x: np.ndarray) -> np.ndarray:
+        """
+        Fitness of genotypes given as binary integers.
+        """
+        raise NotImplementedError
+
+    def decode_bits(self, bits: np.ndarray) -> np.ndarray:
+        """
+        Batch decode of (n, length) matrix of 0/1 values into real arguments.
+        """
+        raise NotImplementedError
+
+    def encode_array(self, args: np.ndarray) -> np.ndarray:
+        """
+        Batch encode of real arguments into (n, length) matrix of 0/1 values.
+        """
+        return bit_population.to_bits([self.encode(arg) for arg in args])
+
+    def get_x_array(self, values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Batch inverse of fitness function: arguments for given fitness values.
+        """
+        return np.array([self.get_x(value) for value in values], dtype=np.float64)
+
+    def __call__(self, args):
+        # matrix of 0/1 values goes to batch evaluation, which reads table and cache itself
+        if isinstance(args, np.ndarray):
+            return self._f_array(args)
+
+        if self._table is not None:
+            if isinstance(args, list):
+                return self._table[np.array([int(arg, 2) for arg in args], dtype=np.int64)].tolist()
+            return float(self._table[int(args, 2)])
+
+        if self._cache is None:
+            return super().__call__(args)
+
+        if not isinstance(args, list):
+            return self._cached_f(args)
+
+        keys = self._keys(args)
+        values, missed = self._cache.lookup(keys)
+        for index in missed:
+            values[index] = self._f(args[index])
+        self._cache.store((keys[index] for index in missed), values[missed])
+
+        return values.tolist()
+
+    def _f_array(self, args: np.ndarray) -> np.ndarray:
+        """
+        Fitness of (n, length) matrix of 0/1 values, a single row is a matrix of one individual.
+        """
+        return self.evaluate_bits(np.atleast_2d(args))
+
+    @staticmethod
+    def _keys(genotypes: typing.List[str]) -> typing.List[bytes]:
+        """
+        Cache keys of genotypes, the same ones evaluate_packed uses for packed rows.
+        """
+        return bit_population.to_keys(bit_population.from_genotypes(genotypes)).tolist()
+
+    def _cached_f(self, arg):
+        key = self._keys([arg])[0]
+        value = self._cache.get(key)
+
+        if value is None:
+            value = self._f(arg)
+            self._cache.put(key, value)
+
+        return value
 
     @property
     def name(self):
@@ -38,6 +220,45 @@ class FitnessFunction(models.Function):
     def is_arg_real(self):
         return False
 
+    def evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        """
+        Batch fitness of the whole population.
+        :param bits: (n, length) matrix of 0/1 values
+        :return: Fitness vector
+        """
+        if self._cache is not None or self._table is not None:
+            return self.evaluate_packed(bit_population.pack(bits), bits.shape[1])
+
+        return self._evaluate_bits(bits)
+
+    def evaluate_packed(self, genes: np.ndarray, length: int) -> np.ndarray:
+        """
+        Batch fitness of the whole population.
+        :param genes: Packed (n, ceil(length / 8)) uint8 rows
+        :param length: Length of each individual
+        :return: Fitness vector
+        """
+        if self._table is not None:
+            return self._table[bit_population.to_ints(genes, length)]
+
+        if self._cache is None:
+            return self._evaluate_packed(genes, length)
+
+        keys = bit_population.to_keys(genes).tolist()
+        values, missed = self._cache.lookup(keys)
+
+        if len(missed):
+            values[missed] = self._evaluate_packed(genes[missed], length)
+            self._cache.store((keys[index] for index in missed), values[missed])
+
+        return values
+
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return np.array([self._f(genotype) for genotype in bit_population.to_genotypes(bits)], dtype=np.float64)
+
+    def _evaluate_packed(self, genes: np.ndarray, length: int) -> np.ndarray:
+        return self._evaluate_bits(bit_population.unpack(genes, length))
+
 
 class FConst(FitnessFunction):
     def decode(self, arg):
@@ -55,6 +276,12 @@ class FConst(FitnessFunction):
     def _f(self, arg):
         return len(arg)
 
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return np.full(bits.shape[0], bits.shape[1], dtype=np.float64)
+
+    def _evaluate_packed(self, genes: np.ndarray, length: int) -> np.ndarray:
+        return np.full(genes.shape[0], length, dtype=np.float64)
+
 
 class FH(FitnessFunction):
     def decode(self, arg):
@@ -70,7 +297,13 @@ class FH(FitnessFunction):
         return "fh"
 
     def _f(self, arg):
-        return float(len(re.findall("0", arg)))
+        return float(arg.count("0"))
+
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return (bits.shape[1] - bits.sum(axis=1, dtype=np.int64)).astype(np.float64)
+
+    def _evaluate_packed(self, genes: np.ndarray, length: int) -> np.ndarray:
+        return (length - bit_population.popcount(genes)).astype(np.float64)
 
 
 class FHD(FitnessFunction):
@@ -91,10 +324,20 @@ class FHD(FitnessFunction):
         return f"fhd(theta:{self._theta})"
 
     def _f(self, arg):
-        k = float(len(re.findall("0", arg)))
+        k = float(arg.count("0"))
 
         return (len(arg) - k) + k * self._theta
 
+    def _from_zeros(self, k: np.ndarray, length: int) -> np.ndarray:
+        k = k.astype(np.float64)
+        return (length - k) + k * self._theta
+
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return self._from_zeros(bits.shape[1] - bits.sum(axis=1, dtype=np.int64), bits.shape[1])
+
+    def _evaluate_packed(self, genes: np.ndarray, length: int) -> np.ndarray:
+        return self._from_zeros(length - bit_population.popcount(genes), length)
+
 
 class FX(FitnessFunction):
     def __init__(self, mode: str, a: float, b: float, m: int, **kwargs):
@@ -165,15 +408,47 @@ class FX(FitnessFunction):
     def get_x(self, arg):
         return self._handler(arg, reverse=True)
 
+    def get_x_array(self, values: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+        """
+        Arguments are clipped to [a, b]: encoding wraps values outside it into unrelated genotypes.
+        """
+        roots = self._handler(np.asarray(values, dtype=np.float64), reverse=True, reverse_tuple=True)
+        if not isinstance(roots, tuple):
+            return np.clip(roots, self._a, self._b)
+
+        # random sign as in get_x, but only roots inside [a, b] can be encoded
+        positive, negative = roots
+        positive_valid = (self._a <= positive) & (positive <= self._b)
+        negative_valid = (self._a <= negative) & (negative <= self._b)
+        use_negative = np.where(positive_valid & negative_valid, rng.random(len(positive)) < 0.5, negative_valid)
+
+        return np.clip(np.where(use_negative, negative, positive), self._a, self._b)
+
     def encode(self, arg):
         return utils.encode_binary(arg, self._a, self._b, self._m)
 
+    def encode_array(self, args: np.ndarray) -> np.ndarray:
+        return utils.encode_binary_array(args, self._a, self._b, self._m)
+
     def decode(self, arg):
         return utils.decode_binary(arg, self._a, self._b, self._m)
 
+    def decode_bits(self, bits: np.ndarray) -> np.ndarray:
+        return utils.decode_binary_array(bits, self._a, self._b, self._m)
+
     def _f(self, arg):
         return self._handler(self.decode(arg))
 
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return self._handler(self.decode_bits(bits))
+
+    @property
+    def domain_length(self) -> int:
+        return self._m
+
+    def _domain_values(self, x: np.ndarray) -> np.ndarray:
+        return self._handler(utils.decode_sampling(self._a, self._b, x, self._m))
+
 
 class FECX(FitnessFunction):
     def __init__(self, c: float, a: float, b: float, m: int, **kwargs):
@@ -189,6 +464,9 @@ class FECX(FitnessFunction):
     def encode(self, arg):
         return utils.encode_binary(arg, self._a, self._b, self._m)
 
+    def encode_array(self, args: np.ndarray) -> np.ndarray:
+        return utils.encode_binary_array(args, self._a, self._b, self._m)
+
     def decode(self, arg):
         return utils.decode_binary(arg, self._a, self._b, self._m)
 
@@ -198,5 +476,18 @@ class FECX(FitnessFunction):
     def get_x(self, arg):
         raise NotImplementedError
 
+    def decode_bits(self, bits: np.ndarray) -> np.ndarray:
+        return utils.decode_binary_array(bits, self._a, self._b, self._m)
+
     def _f(self, arg):
         return math.exp(self._c * self.decode(arg))
+
+    def _evaluate_bits(self, bits: np.ndarray) -> np.ndarray:
+        return np.exp(self._c * self.decode_bits(bits))
+
+    @property
+    def domain_length(self) -> int:
+        return self._m
+
+    def _domain_values(self, x: np.ndarray) -> np.ndarray:
+        return np.exp(self._c * utils.decode_sampling(self._a, self._b, x, self._m))
@@ -0,0 +1,76 @@
+import typing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 2^24 float64 values take 128 MiB
+MAX_TABULATED_LENGTH = 24
+
+
+class FitnessTable:
+    """
+    Fitness of every genotype of m-bit domain, index is the genotype read as binary integer.
+    Table can be placed in shared memory: pickling a shared table sends only the segment name,
+    so worker processes attach to the same memory instead of copying values.
+    """
+
+    def __init__(self, values: np.ndarray, shm: typing.Union[shared_memory.SharedMemory, None] = None):
+        self._values: np.ndarray = values
+        self._shm: typing.Union[shared_memory.SharedMemory, None] = shm
+        self._owner: bool = False
+
+    @classmethod
+    def shared(cls, values: np.ndarray) -> "FitnessTable":
+        """
+        Copies values into a new shared memory segment, owned (and later unlinked) by the caller.
+        """
+        shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+        table = cls(np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf), shm)
+        table._values[:] = values
+        table._owner = True
+
+        return table
+
+    @classmethod
+    def attach(cls, name: str, size: int) -> "FitnessTable":
+        # pool workers share resource tracker with the creating process, which unlinks the segment
+        shm = shared_memory.SharedMemory(name=name)
+
+        return cls(np.ndarray((size,), dtype=np.float64, buffer=shm.buf), shm)
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    @property
+    def is_shared(self) -> bool:
+        return self._shm is not None
+
+    def release(self):
+        """
+        Detaches from shared memory, segment is also removed if this table created it.
+        """
+        if self._shm is None:
+            return
+
+        self._values = None
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+        self._shm = None
+
+    def __del__(self):
+        if not self._owner:
+            self.release()
+
+    def __getitem__(self, item):
+        return self._values[item]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __reduce__(self):
+        if self._shm is None:
+            return FitnessTable, (self._values,)
+
+        return FitnessTable.attach, (self._shm.name, len(self._values))
@@ -1,22 +1,20 @@
 import collections
 import json
 import logging
-import math
-import random
-import re
 import typing
 
 import numpy as np
 
 import models
-from core import fitness_functions, utils
+from core import crossover, fitness_functions, metrics, mutation, selection_algorithms, utils
+from models import bit_population
 from core.fitness_functions import FConst
 
 
 class GeneticAlgorithm:
     def __init__(
             self, *,
-            base_population: typing.List[str],
+            base_population: typing.Union[typing.List[str], np.ndarray],
             fitness_function: fitness_functions.FitnessFunction,
             scale_function: models.Function,
             selection_algo: typing.Callable[
@@ -24,17 +22,31 @@ class GeneticAlgorithm:
             ],
             optimal: str,
             use_crossingover: bool,
+            crossover_type: str = "one_point",
             modified_selection_algo: bool = False,
             stats_mode: str = "full",
+            sort_population: bool = True,
             max_iteration: int = 10_000_000,
             mutation_rate: typing.Union[None, float] = None,
+            mutation_mode: str = "auto",
             early_stopping: typing.Union[None, int] = None,
             draw_step: typing.Union[None, int] = None,
             draw_total_steps: bool = False,
             graphics_dir: str = None,
+            history_size: typing.Union[None, int] = None,
+            backend: str = "object",
+            seed: typing.Union[None, int, np.random.SeedSequence] = None,
+            base_fitness: typing.Union[None, np.ndarray] = None,
     ):
+        """
+        :param base_fitness: Fitness of base population if already known
+        """
         self.use_crossingover = use_crossingover
-        self._base_population: typing.List[str] = base_population
+        self._crossover_type: str = crossover_type
+        self._backend: str = backend
+        self._rng: np.random.Generator = np.random.default_rng(seed)
+        # list of bit strings or (n, length) matrix of 0/1 values
+        self._base_population: typing.Union[typing.List[str], np.ndarray] = base_population
 
         self._fitness_function: fitness_functions.FitnessFunction = fitness_function
         self._scale_function: models.Function = scale_function
@@ -42,6 +54,11 @@ class GeneticAlgorithm:
             [models.Population], models.Population
         ] = selection_algo
         self._modified_selection_algo = modified_selection_algo
+        self._use_scaled_fitness: bool = selection_algorithms.uses_scaled_fitness(selection_algo)
+        self._selection_takes_rng: bool = selection_algorithms.takes_rng(selection_algo)
+        # order matters only for scaled selection: stats find the best individual by argmax
+        # and count its copies anywhere in an unsorted population
+        self._sort_population: bool = sort_population and self._use_scaled_fitness
         self._optimal: str = optimal
 
         self._stats_mode: str = stats_mode
@@ -50,30 +67,31 @@ class GeneticAlgorithm:
         self._draw_total_steps = draw_total_steps
         self._iteration: int = 0
         self._mutation_rate: float = mutation_rate
+        self._mutation_mode: str = mutation_mode
         self._early_stopping: int = early_stopping
         self._early_stopping_iteration: int = 0  # works only with mutation rate
 
-        self._populations: typing.List[models.Population] = []
-        self._total_scores: typing.List[float] = []
+        # only the current and the previous populations are read
+        self._populations: typing.Deque[models.Population] = collections.deque(maxlen=2)
+        # per-generation metrics: whole history if history_size is None, otherwise the last history_size values
+        self._trace: metrics.MetricTrace = metrics.MetricTrace(capacity=history_size)
 
-        self._population: models.Population = self._evaluate_population(self._base_population)
+        self._population: models.Population = self._evaluate_population(self._base_population, base_fitness)
         self._population_len: int = len(self._population)
-        self._individual_len: int = len(self._population.individuals[0])
+        self._individual_len: int = len(self._base_population[0])
         self._total_genes: int = self._population_len * self._individual_len
+        if self._mutation_rate is not None:
+            self._mutation_mode = mutation.resolve_mode(mutation_mode, self._individual_len, self._mutation_rate)
 
         self._stats: typing.Dict[str, typing.Union[float, str]] = {}
-        self._selection_differences: typing.List[float] = []
-        self._reproduction_coeffs: typing.List[float] = []
-        self._loss_of_diversity_coeffs: typing.List[float] = []
-        self._selection_intensities: typing.List[float] = []
-        self._growth_rates: typing.List[float] = []
+        # streaming mean and extremes of per-generation metrics, labeled by iteration
+        self._metrics: typing.Dict[str, metrics.RunningStats] = collections.defaultdict(metrics.RunningStats)
         self._convergence_iteration: typing.Union[None, float] = None
 
         self._graphics_dir: str = graphics_dir
-        self._graphics_data: dict = collections.defaultdict(list)
 
     @property
-    def base_population(self) -> typing.List[str]:
+    def base_population(self) -> typing.Union[typing.List[str], np.ndarray]:
         return self._base_population
 
     @property
@@ -85,12 +103,16 @@ class GeneticAlgorithm:
         return self._iteration
 
     @property
-    def populations(self) -> typing.List[models.Population]:
+    def populations(self) -> typing.Deque[models.Population]:
         return self._populations
 
     @property
-    def total_scores(self) -> typing.List[float]:
-        return self._total_scores
+    def total_scores(self) -> np.ndarray:
+        return self._trace["total_score"]
+
+    @property
+    def trace(self) -> metrics.MetricTrace:
+        return self._trace
 
     @property
     def population(self) -> models.Population:
@@ -102,9 +124,10 @@ class GeneticAlgorithm:
 
     def _update_noise_stats(self):
         self._stats["NI"] = self._convergence_iteration or -1
-        self._stats["ConvTo"] = 0 if self._population.individuals[0].is_zero() else 1
-        self._stats["RR_avg"] = np.mean(self._reproduction_coeffs)
-        self._stats["Teta_avg"] = np.mean(self._loss_of_diversity_coeffs)
+        self._stats["ConvTo"] = 0 if self._population.is_zero(0) else 1
+        self._stats["RR_avg"] = self._metrics["reproduction"].mean
+        self._stats["Teta_avg"] = self._metrics["loss_of_diversity"].mean
+        self._update_extremes({"reproduction": "RR", "loss_of_diversity": "Teta"})
     #
     # def _update_stats(self):
     #     if self._stats_mode == "noise":
@@ -214,78 +237,43 @@ class GeneticAlgorithm:
         current_population: models.Population = self._populations[-1]
 
 
-        in_parent_pool = 0
-        best = current_population.get_fittest(1)[0]
-        num_of_best = 0
-        best_in_previous = previous_population.get_fittest(1)[0]
-        num_of_best_in_previous = 0
-
-        for individual in previous_population.individuals[::-1]:
-            if individual == best_in_previous:
-                num_of_best_in_previous += 1
-            if individual in current_population:
-                in_parent_pool += 1
-
-        for individual in current_population.individuals[::-1]:
-            if individual == best:
-                num_of_best += 1
-                continue
-            break
+        if current_population.parents is not None:
+            in_parent_pool = previous_population.count_parents_present(current_population)
+        else:  # population without lineage
+            in_parent_pool = previous_population.count_present_in(current_population)
 
         reproduction = in_parent_pool / self._population_len
         loss_of_diversity = 1 - reproduction
 
-        self._reproduction_coeffs.append(reproduction)
-        self._loss_of_diversity_coeffs.append(loss_of_diversity)
-
-        if reproduction < self._stats.get("RR_min", math.inf):
-            self._stats["RR_min"] = reproduction
-            self._stats["NI_RR_min"] = self._iteration
-        if reproduction > self._stats.get("RR_max", -math.inf):
-            self._stats["RR_max"] = reproduction
-            self._stats["NI_RR_max"] = self._iteration
-        if loss_of_diversity < self._stats.get("Teta_min", math.inf):
-            self._stats["Teta_min"] = loss_of_diversity
-            self._stats["NI_Teta_min"] = self._iteration
-        if loss_of_diversity > self._stats.get("Teta_max", -math.inf):
-            self._stats["Teta_max"] = loss_of_diversity
-            self._stats["NI_Teta_max"] = self._iteration
-
-        self._graphics_data["reproduction"].append(reproduction)
-        self._graphics_data["loss_of_diversity"].append(loss_of_diversity)
+        self._record("reproduction", reproduction)
+        self._record("loss_of_diversity", loss_of_diversity)
 
         if self._stats_mode == "noise":
             return
 
-        selection_difference = current_population.avg_score - previous_population.avg_score
-        self._selection_differences.append(selection_difference)
+        best_in_previous = previous_population.get_best()
+        num_of_best_in_previous = previous_population.count(best_in_previous)
+        if self._sort_population:
+            num_of_best = current_population.count_top_copies()
+        else:
+            num_of_best = current_population.count_best_copies()
 
-        if selection_difference < self._stats.get("s_min", math.inf):
-            self._stats["s_min"] = selection_difference
-            self._stats["NI_s_min"] = self._iteration
-        if selection_difference > self._stats.get("s_max", -math.inf):
-            self._stats["s_max"] = selection_difference
-            self._stats["NI_s_max"] = self._iteration
+        selection_difference = current_population.avg_score - previous_population.avg_score
+        self._record("difference", selection_difference)
 
         if previous_population.std_score == 0:
             selection_intensity = 0
         else:
             selection_intensity = selection_difference / previous_population.std_score
-        self._selection_intensities.append(selection_intensity)
+        self._record("intensity", selection_intensity)
 
-        if selection_intensity < self._stats.get("I_min", math.inf):
-            self._stats["I_min"] = selection_intensity
-            self._stats["NI_I_min"] = self._iteration
-        if selection_intensity > self._stats.get("I_max", -math.inf):
-            self._stats["I_max"] = selection_intensity
-            self._stats["NI_I_max"] = self._iteration
 
 
 
         growth_rate = 0
         if num_of_best >= num_of_best_in_previous:
             growth_rate = num_of_best / num_of_best_in_previous
-        self._growth_rates.append(growth_rate)
+        self._record("growth_rate", growth_rate)
 
         if self._iteration == 1:
             self._stats["GR_early"] = growth_rate
@@ -296,13 +284,24 @@ class GeneticAlgorithm:
 
 
         # graphics data
-        self._graphics_data["avg_score"].append(current_population.avg_score)
-        self._graphics_data["best_score"].append(current_population.best_score)
-        self._graphics_data["intensity"].append(selection_intensity)
-        self._graphics_data["difference"].append(selection_difference)
-        self._graphics_data["std_score"].append(current_population.std_score)
-        self._graphics_data["best_part"].append(num_of_best / self._population_len)
-        self._graphics_data["growth_rate"].append(growth_rate)
+        self._trace.append("avg_score", current_population.avg_score)
+        self._trace.append("best_score", current_population.best_score)
+        self._trace.append("std_score", current_population.std_score)
+        self._trace.append("best_part", num_of_best / self._population_len)
+
+    def _record(self, name: str, value: float):
+        self._metrics[name].add(value, self._iteration)
+        self._trace.append(name, value)
+
+    def _update_extremes(self, names: typing.Dict[str, str]):
+        for name, key in names.items():
+            stats = self._metrics[name]
+            if not stats.count:
+                continue
+            self._stats[f"{key}_min"] = stats.min
+            self._stats[f"NI_{key}_min"] = stats.argmin
+            self._stats[f"{key}_max"] = stats.max
+            self._stats[f"NI_{key}_max"] = stats.argmax
 
 
     def _update_final_stats(self):
@@ -310,22 +309,25 @@ class GeneticAlgorithm:
             self._update_noise_stats()
             return
 
-        self._stats["s_avg"] = np.mean(self._selection_differences)
-        self._stats["RR_avg"] = np.mean(self._reproduction_coeffs)
-        self._stats["Teta_avg"] = np.mean(self._loss_of_diversity_coeffs)
+        self._stats["s_avg"] = self._metrics["difference"].mean
+        self._stats["RR_avg"] = self._metrics["reproduction"].mean
+        self._stats["Teta_avg"] = self._metrics["loss_of_diversity"].mean
         self._stats["F_avg"] = self._population.avg_score
-        self._stats["F_found"] = self._population.get_fittest(1)[0].fitness
-        self._stats["F"] = self._population.get_fittest(1)[0].genotype
-        self._stats["I_avg"] = np.mean(self._selection_intensities)
-        self._stats["GR_avg"] = np.mean(self._growth_rates)
+        best = self._population.get_best()
+        self._stats["F_found"] = best.fitness
+        self._stats["F"] = best.genotype
+        self._stats["I_avg"] = self._metrics["intensity"].mean
+        self._stats["GR_avg"] = self._metrics["growth_rate"].mean
         self._stats["NI"] = self._convergence_iteration or -1
+        self._update_extremes({"difference": "s", "intensity": "I", "reproduction": "RR", "loss_of_diversity": "Teta"})
 
     def _draw_hists(self, iteration=None):
         iteration = "final" if iteration is None else iteration
-        ones_in_genotypes = [
-            len(re.findall("1", individual.genotype))
-            for individual in self._population.individuals
-        ]
+        if self._backend == "numpy":
+            bits = self._population.bits
+        else:
+            bits = bit_population.to_bits([individual.genotype for individual in self._population.individuals])
+        ones_in_genotypes = bits.sum(axis=1)
         utils.draw_hist(
             ones_in_genotypes,
             f"Amount of '1' in chromosomes: {iteration} iteration",
@@ -336,10 +338,7 @@ class GeneticAlgorithm:
 
         if self._fitness_function.is_arg_real():
             fitness_arr = self._population.fitness_arr
-            x_vals = [
-                self._fitness_function.decode(individual.genotype)
-                for individual in self._population.individuals
-            ]
+            x_vals = self._fitness_function.decode_bits(bits)
             utils.draw_hist(
                 fitness_arr,
                 f"Fitness Score Hist: {iteration} iteration",
@@ -357,93 +356,129 @@ class GeneticAlgorithm:
 
     def _draw_graphics(self):
         with open(f"{self._graphics_dir}/data.json", 'w', encoding='utf-8') as f:
-            json.dump(self._graphics_data, f, ensure_ascii=False, indent=4)
+            json.dump(self._trace.to_dict(), f, ensure_ascii=False, indent=4)
 
         utils.draw_graphics(
-            self._graphics_data["avg_score"], "AVG FITNESS", "N generation", "Avg fitness",
+            self._trace["avg_score"], "AVG FITNESS", "N generation", "Avg fitness",
             filename=f"{self._graphics_dir}/avg_score.png"
         )
         utils.draw_graphics(
-            self._graphics_data["best_score"], "BEST FITNESS", "N generation", "Best fitness",
+            self._trace["best_score"], "BEST FITNESS", "N generation", "Best fitness",
             filename=f"{self._graphics_dir}/best_score.png"
         )
         utils.draw_graphics(
-            self._graphics_data["intensity"], "SELECTION INTENSITY", "N generation", "Intensity",
+            self._trace["intensity"], "SELECTION INTENSITY", "N generation", "Intensity",
             filename=f"{self._graphics_dir}/selection_intensity.png"
         )
         utils.draw_graphics(
-            self._graphics_data["difference"], "SELECTION DIFFERENCE", "N generation", "Difference",
+            self._trace["difference"], "SELECTION DIFFERENCE", "N generation", "Difference",
             filename=f"{self._graphics_dir}/selection_difference.png"
         )
         utils.draw_graphics(
-            self._graphics_data["std_score"], "STANDARD DEVIATION", "N generation", "Std",
+            self._trace["std_score"], "STANDARD DEVIATION", "N generation", "Std",
             filename=f"{self._graphics_dir}/std.png"
         )
         utils.draw_multiple(
-            [self._graphics_data["intensity"], self._graphics_data["difference"]], "INTENSITY AND DIFFERENCE",
+            [self._trace["intensity"], self._trace["difference"]], "INTENSITY AND DIFFERENCE",
             "N generation", "Intensity and Difference",
             filename=f"{self._graphics_dir}/intensity_difference.png"
         )
         utils.draw_graphics(
-            self._graphics_data["best_part"], "COPIES OF BEST", "N generation", "Num of copies",
+            self._trace["best_part"], "COPIES OF BEST", "N generation", "Num of copies",
             filename=f"{self._graphics_dir}/best_count.png"
         )
         utils.draw_graphics(
-            self._graphics_data["growth_rate"], "GROWTH RATE", "N generation", "Growth rate",
+            self._trace["growth_rate"], "GROWTH RATE", "N generation", "Growth rate",
             filename=f"{self._graphics_dir}/growth_rate.png"
         )
         utils.draw_multiple(
-            [self._graphics_data["reproduction"], self._graphics_data["loss_of_diversity"]],
+            [self._trace["reproduction"], self._trace["loss_of_diversity"]],
             "REPRODUCTION AND LOSS OF DIVERSITY", "N generation", "Reproduction and Loss of Diversity",
             filename=f"{self._graphics_dir}/reproduction_loss_of_diversity.png"
         )
 
     def _mutate(self):
-        population_changed = False
+        if self._backend == "numpy":
+            self._mutate_bits()
+            return
 
-        for individual in self._population.individuals:
-            changed = False
+        changed, genotypes = mutation.GENOTYPE_OPERATORS[self._mutation_mode](
+            [individual.genotype for individual in self._population.individuals], self._mutation_rate, self._rng
+        )
 
-            for gene_index in range(self._individual_len):
-                if random.random() < self._mutation_rate:
-                    changed = True
-                    new_val = "1" if individual.genotype[gene_index] == "0" else "0"
-                    individual.genotype = individual.genotype[:gene_index] + new_val + individual.genotype[gene_index + 1:]
+        if not len(changed):
+            return
 
-            if changed:
-                population_changed = True
-                individual.fitness = self._fitness_function(individual.genotype)
+        # selected individuals are shared between populations, so mutants are new objects
+        self._population.replace(changed, [
+            models.Individual(genotype, fitness)
+            for genotype, fitness in zip(genotypes, self._fitness_function(genotypes))
+        ])
 
-        if population_changed:
-            self._population.invalidate()
+    def _mutate_bits(self):
+        changed, genes = mutation.PACKED_OPERATORS[self._mutation_mode](
+            self._population.genes, self._individual_len, self._mutation_rate, self._rng
+        )
+
+        if not len(changed):
+            return
+
+        self._population.replace(
+            changed, genes, self._fitness_function.evaluate_packed(genes, self._individual_len)
+        )
+
+    def _evaluate_population(
+            self, population: typing.Union[typing.List[str], np.ndarray],
+            fitness: typing.Union[None, np.ndarray] = None,
+    ) -> models.Population:
+        if self._backend == "numpy":
+            length = len(population[0])
+            if isinstance(population, np.ndarray):
+                genes = bit_population.pack(population)
+            else:
+                genes = bit_population.from_genotypes(population)
+            if fitness is None:
+                fitness = self._fitness_function.evaluate_packed(genes, length)
+            else:
+                # base fitness may be shared by several runs
+                fitness = np.array(fitness, dtype=np.float64)
+            return models.BitPopulation(genes, fitness, length)
+
+        if isinstance(population, np.ndarray):
+            population = bit_population.to_genotypes(population)
+        if fitness is None:
+            fitness = [self._fitness_function(individual) for individual in population]
+        else:
+            fitness = np.asarray(fitness, dtype=np.float64).tolist()
 
-    def _evaluate_population(self, population: typing.List[str]) -> models.Population:
         individuals = []
 
-        for individual in population:
-            fitness = self._fitness_function(individual)
-            individuals.append(models.Individual(individual, fitness))
+        for individual, individual_fitness in zip(population, fitness):
+            individuals.append(models.Individual(individual, individual_fitness))
 
         return models.Population(individuals)
 
 
     def _calculate_scaled_fitness(self):
-        for individual in self._population.individuals:
-            individual.scaled_fitness = self._scale_function(individual.fitness)
+        if self._backend == "numpy":
+            self._population.scaled_fitness_arr = self._scale_function(self._population.fitness)
+            return
+
+        scaled_fitness = self._scale_function(np.asarray(self._population.fitness_arr, dtype=np.float64))
+        for individual, value in zip(self._population.individuals, scaled_fitness.tolist()):
+            individual.scaled_fitness = value
 
     def fit(self):
         logging.info("Starting fitting")
 
         while True:
-            self._population.sort()
+            if self._sort_population:
+                self._population.sort()
 
             total_score: float = self._population.score
 
             self._populations.append(self._population)
-            self._total_scores.append(total_score)
-
-            if len(self._populations) > 10:
-                self._populations.pop(0)
+            self._trace.append("total_score", total_score)
 
             if self._iteration > 0:
                 self._update_stats()
@@ -469,8 +504,12 @@ class GeneticAlgorithm:
             if self._graphics_dir and self._iteration < 5:
                 self._draw_hists(self._iteration)
 
-            self._calculate_scaled_fitness()
-            self._population = self._selection_algo(self._population)
+            if self._use_scaled_fitness:
+                self._calculate_scaled_fitness()
+            if self._selection_takes_rng:
+                self._population = self._selection_algo(self._population, rng=self._rng)
+            else:
+                self._population = self._selection_algo(self._population)
             if self.use_crossingover:
                 self._population = self.apply_crossingover()
 
@@ -502,6 +541,8 @@ class GeneticAlgorithm:
               f"Convergence: {self._convergence_iteration}"
         logging.info(msg)
         # print(msg)
+        if self._fitness_function.cache is not None:
+            logging.info(f"Fitness cache: {self._fitness_function.cache.info()}")
 
         if self._draw_step:
             utils.draw_hist(self._population.fitness_arr, msg, "Scores", "Number of Individuals")
@@ -510,38 +551,54 @@ class GeneticAlgorithm:
 
         if self._draw_total_steps:
             utils.draw_graphics(
-                self._total_scores, "Total score", "N generation", "Score",
+                self.total_scores, "Total score", "N generation", "Score",
             )
 
         if self._graphics_dir:
             self._draw_hists()
             self._draw_graphics()
 
-    def _crossingover(self, parent1: models.Individual, parent2: models.Individual):
-        a, b = parent1.genotype, parent2.genotype
-        point = random.randint(0, len(a) - 1)
-        child1_genotype = a[:point + 1] + b[point + 1:]
-        child1_fitness = self._fitness_function(child1_genotype)
-        child1 = models.Individual(child1_genotype, child1_fitness)
-
-        # child2_genotype = b[:point + 1] + a[point + 1:]
-        # child2_fitness = self._fitness_function(child2_genotype)
-        # child2 = models.Individual(child2_genotype, child2_fitness)
-        # return child1, child2
-        return child1
+    def _crossover_parents(
+            self, genes: np.ndarray, children: np.ndarray, index_1: np.ndarray, index_2: np.ndarray
+    ) -> typing.Union[None, np.ndarray]:
+        """
+        Lineage of crossover children: a child equal to one of its parents is a copy of the individual
+        that parent was selected from, other children are new (-1).
+        """
+        selected = self._population.parents
+        if selected is None:
+            return None
+
+        parents = np.full(len(children), -1, dtype=np.int64)
+        same_1 = (children == genes[index_1]).all(axis=1)
+        same_2 = ~same_1 & (children == genes[index_2]).all(axis=1)
+        parents[same_1] = selected[index_1[same_1]]
+        parents[same_2] = selected[index_2[same_2]]
+
+        return parents
+
+    def _apply_crossingover_bits(self) -> models.BitPopulation:
+        genes = self._population.genes
+        children, index_1, index_2 = crossover.crossover(genes, self._individual_len, self._crossover_type, self._rng)
+        fitness = self._fitness_function.evaluate_packed(children, self._individual_len)
+
+        return models.BitPopulation(
+            children, fitness, self._individual_len,
+            parents=self._crossover_parents(genes, children, index_1, index_2),
+        )
 
     def apply_crossingover(self):
-        new_population = []
-        population_length = len(self._population)
-        for i in range(population_length):
-            index_1 = random.randint(0, population_length - 1)
-            index_2 = random.randint(0, population_length - 1)
-            while index_1 == index_2:
-                index_2 = random.randint(0, population_length - 1)
-
-            parent1 = self._population.individuals[index_1]
-            parent2 = self._population.individuals[index_2]
-
-            child = self._crossingover(parent1, parent2)
-            new_population.append(child)
-        return models.Population(new_population)
+        if self._backend == "numpy":
+            return self._apply_crossingover_bits()
+
+        genes = bit_population.from_genotypes([individual.genotype for individual in self._population.individuals])
+        children, index_1, index_2 = crossover.crossover(genes, self._individual_len, self._crossover_type, self._rng)
+        genotypes = bit_population.to_genotypes(bit_population.unpack(children, self._individual_len))
+
+        return models.Population(
+            [
+                models.Individual(genotype, fitness)
+                for genotype, fitness in zip(genotypes, self._fitness_function(genotypes))
+            ],
+            parents=self._crossover_parents(genes, children, index_1, index_2),
+        )
@@ -0,0 +1,163 @@
+import math
+import typing
+
+import numpy as np
+
+
+class MetricTrace:
+    """
+    Per-generation values of named metrics kept in preallocated float64 arrays.
+    With capacity None arrays grow by doubling and keep the whole history,
+    otherwise each array is a ring with the last `capacity` values (0 keeps nothing).
+    """
+
+    def __init__(self, capacity: typing.Union[int, None] = None, initial_size: int = 1024):
+        self._capacity: typing.Union[int, None] = capacity
+        self._initial_size: int = initial_size if capacity is None else capacity
+        self._buffers: typing.Dict[str, np.ndarray] = {}
+        self._counts: typing.Dict[str, int] = {}
+
+    @property
+    def capacity(self) -> typing.Union[int, None]:
+        return self._capacity
+
+    def append(self, name: str, value: float):
+        if self._capacity == 0:
+            return
+
+        buffer = self._buffers.get(name)
+        if buffer is None:
+            buffer = self._buffers[name] = np.empty(self._initial_size, dtype=np.float64)
+            self._counts[name] = 0
+
+        count = self._counts[name]
+        if self._capacity is None:
+            if count == len(buffer):
+                buffer = self._buffers[name] = np.concatenate([buffer, np.empty(len(buffer), dtype=np.float64)])
+            buffer[count] = value
+        else:
+            buffer[count % self._capacity] = value
+
+        self._counts[name] = count + 1
+
+    def count(self, name: str) -> int:
+        """
+        Number of values appended under the name (including ones already dropped from the ring).
+        """
+        return self._counts.get(name, 0)
+
+    def get(self, name: str) -> np.ndarray:
+        """
+        Kept values in order of appending.
+        """
+        count = self._counts.get(name, 0)
+        if not count:
+            return np.empty(0, dtype=np.float64)
+
+        buffer = self._buffers[name]
+        if self._capacity is None or count <= self._capacity:
+            return buffer[:count]
+
+        return np.roll(buffer, -(count % self._capacity))
+
+    def to_dict(self) -> typing.Dict[str, typing.List[float]]:
+        return {name: self.get(name).tolist() for name in self._buffers}
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._buffers
+
+
+class RunningStats:
+    """
+    Streaming count, mean, variance (Welford), min and max of a metric in O(1) memory.
+    Min and max keep the label (e.g. iteration or run) of the first value reaching them.
+    Accumulators filled separately (e.g. in different workers) are combined with merge().
+    """
+
+    def __init__(self):
+        self._count: int = 0
+        self._mean: float = 0.0
+        self._m2: float = 0.0
+        self._min: float = math.inf
+        self._argmin: typing.Any = None
+        self._max: float = -math.inf
+        self._argmax: typing.Any = None
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def mean(self) -> float:
+        return self._mean if self._count else math.nan
+
+    @property
+    def var(self) -> float:
+        """
+        Population variance (same as np.var).
+        """
+        return self._m2 / self._count if self._count else math.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var)
+
+    @property
+    def min(self) -> float:
+        return self._min
+
+    @property
+    def argmin(self) -> typing.Any:
+        return self._argmin
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def argmax(self) -> typing.Any:
+        return self._argmax
+
+    def add(self, value: float, label: typing.Any = None):
+        """
+        :param value: New value
+        :param label: Label of the value for argmin/argmax, its position by default
+        """
+        if label is None:
+            label = self._count
+
+        self._count += 1
+        delta = float(value) - self._mean
+        self._mean += delta / self._count
+        self._m2 += delta * (float(value) - self._mean)
+
+        if value < self._min:
+            self._min, self._argmin = value, label
+        if value > self._max:
+            self._max, self._argmax = value, label
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        Adds values of other accumulator (Chan et al. parallel update), ties of min/max keep own labels.
+        """
+        if not other._count:
+            return self
+
+        count = self._count + other._count
+        delta = other._mean - self._mean
+        self._mean += delta * other._count / count
+        self._m2 += other._m2 + delta * delta * self._count * other._count / count
+        self._count = count
+
+        if other._min < self._min:
+            self._min, self._argmin = other._min, other._argmin
+        if other._max > self._max:
+            self._max, self._argmax = other._max, other._argmax
+
+        return self
+
+    def __repr__(self):
+        return f"RunningStats(count={self._count}, mean={self.mean}, std={self.std}, min={self._min}, max={self._max})"
@@ -0,0 +1,128 @@
+import typing
+
+import numpy as np
+
+from models import bit_population
+
+
+def flip_mask(n: int, length: int, rate: float, rng: np.random.Generator) -> np.ndarray:
+    """
+    Draws bit-flip mask for the whole population in one step.
+    :param n: Number of individuals
+    :param length: Length of each individual
+    :param rate: Probability of each gene to flip
+    :param rng: Random generator
+    :return: (n, length) boolean matrix, True where gene flips
+    """
+    return rng.random((n, length)) < rate
+
+
+def bit_flip(
+        genes: np.ndarray, length: int, rate: float, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Bit-flip mutation of packed population rows.
+    :param genes: Packed (n, ceil(length / 8)) uint8 rows
+    :param length: Length of each individual
+    :param rate: Probability of each gene to flip
+    :param rng: Random generator
+    :return: Indices of changed rows and their mutated packed rows
+    """
+    mask = flip_mask(len(genes), length, rate, rng)
+    changed = np.flatnonzero(mask.any(axis=1))
+
+    return changed, genes[changed] ^ bit_population.pack(mask[changed])
+
+
+def flip_genotypes(
+        genotypes: typing.List[str], rate: float, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, typing.List[str]]:
+    """
+    Bit-flip mutation of string genotypes ('0' and '1' differ only in the lowest ASCII bit).
+    :param genotypes: List of bit strings of equal length
+    :param rate: Probability of each gene to flip
+    :param rng: Random generator
+    :return: Indices of changed genotypes and their mutated strings
+    """
+    mask = flip_mask(len(genotypes), len(genotypes[0]), rate, rng)
+    changed = np.flatnonzero(mask.any(axis=1))
+
+    mutated = [
+        (np.frombuffer(genotypes[index].encode("ascii"), dtype=np.uint8) ^ mask[index]).tobytes().decode("ascii")
+        for index in changed
+    ]
+    return changed, mutated
+
+
+def sample_flips(
+        n: int, length: int, rate: float, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Event-driven sampling of bit flips: draws number of flips from Binomial(n * length, rate)
+    and then only their positions, so the cost scales with number of flips, not with population size.
+    :param n: Number of individuals
+    :param length: Length of each individual
+    :param rate: Probability of each gene to flip
+    :param rng: Random generator
+    :return: Row and column indices of flipped genes (sorted by row)
+    """
+    total = n * length
+    flips = rng.binomial(total, rate)
+
+    if not flips:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+
+    positions = np.sort(rng.choice(total, flips, replace=False))
+    return positions // length, positions % length
+
+
+def sparse_bit_flip(
+        genes: np.ndarray, length: int, rate: float, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Same as bit_flip, but samples only the flipped positions (see sample_flips).
+    """
+    rows, cols = sample_flips(len(genes), length, rate, rng)
+    changed, rows = np.unique(rows, return_inverse=True)
+
+    mutated = genes[changed]
+    np.bitwise_xor.at(mutated, (rows, cols >> 3), (0x80 >> (cols & 7)).astype(np.uint8))
+
+    return changed, mutated
+
+
+def sparse_flip_genotypes(
+        genotypes: typing.List[str], rate: float, rng: np.random.Generator
+) -> typing.Tuple[np.ndarray, typing.List[str]]:
+    """
+    Same as flip_genotypes, but samples only the flipped positions (see sample_flips).
+    """
+    rows, cols = sample_flips(len(genotypes), len(genotypes[0]), rate, rng)
+    changed, starts = np.unique(rows, return_index=True)
+
+    mutated = []
+    for index, row_cols in zip(changed, np.split(cols, starts[1:])):
+        genotype = np.frombuffer(genotypes[index].encode("ascii"), dtype=np.uint8).copy()
+        genotype[row_cols] ^= 1
+        mutated.append(genotype.tobytes().decode("ascii"))
+
+    return changed, mutated
+
+
+PACKED_OPERATORS = {"dense": bit_flip, "sparse": sparse_bit_flip}
+GENOTYPE_OPERATORS = {"dense": flip_genotypes, "sparse": sparse_flip_genotypes}
+
+
+def resolve_mode(mode: str, length: int, rate: float) -> str:
+    """
+    Resolves "auto" mutation mode: sparse sampling pays off when an individual
+    gets less than one flip per generation on average.
+    """
+    if mode == "auto":
+        return "sparse" if rate * length < 1 else "dense"
+
+    if mode not in PACKED_OPERATORS:
+        raise ValueError(f"Unknown mutation mode: {mode}")
+
+    return mode
@@ -0,0 +1,202 @@
+import pickle
+import typing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from models import bit_population
+
+# arrays of at least this size are returned from workers through shared memory instead of pickles
+SHARED_ARRAY_MIN_BYTES = 1 << 16
+# number of published contexts kept unpickled by each worker
+CONTEXT_CACHE_SIZE = 4
+
+# stats keys of GeneticAlgorithm (and BatchedGeneticAlgorithm) runs by type, "F" is a genotype
+INT_STATS = (
+    "NI", "ConvTo", "NI_GR_late",
+    "NI_s_min", "NI_s_max", "NI_I_min", "NI_I_max", "NI_RR_min", "NI_RR_max", "NI_Teta_min", "NI_Teta_max",
+)
+FLOAT_STATS = (
+    "F_avg", "F_found", "GR_early", "GR_late", "GR_avg",
+    "s_avg", "s_min", "s_max", "I_avg", "I_min", "I_max",
+    "RR_avg", "RR_min", "RR_max", "Teta_avg", "Teta_min", "Teta_max",
+)
+STATS_KEYS = INT_STATS + FLOAT_STATS + ("F",)
+
+
+class Job(typing.NamedTuple):
+    """
+    Task of evaluator's pool: only ids, everything else is resolved against the published context in worker.
+    """
+    context: str  # name of shared memory segment with the pickled context
+    experiment: int
+    start: int  # epochs start ... stop - 1
+    stop: int
+    selection: int  # index of selection function, -1 for all of them
+
+
+class SharedArray(typing.NamedTuple):
+    """
+    Handle of an array placed in shared memory by a worker, the receiver copies it and removes the segment.
+    """
+    name: str
+    shape: typing.Tuple[int, ...]
+    dtype: np.dtype
+
+
+def publish(obj: typing.Any) -> shared_memory.SharedMemory:
+    """
+    Pickles object into a new shared memory segment, owned (and later unlinked) by the caller.
+    """
+    data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+    shm = shared_memory.SharedMemory(create=True, size=len(data))
+    shm.buf[:len(data)] = data
+
+    return shm
+
+
+_contexts: typing.Dict[str, typing.Any] = {}
+
+
+def resolve(name: str) -> typing.Any:
+    """
+    Object published under the name, unpickled once per worker.
+    """
+    if name not in _contexts:
+        if len(_contexts) >= CONTEXT_CACHE_SIZE:
+            del _contexts[next(iter(_contexts))]
+        # pool workers share resource tracker with the publishing process, which unlinks the segment
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            _contexts[name] = pickle.loads(shm.buf)
+        finally:
+            shm.close()
+
+    return _contexts[name]
+
+
+def result_name(job: Job) -> str:
+    """
+    Name of shared memory segment with result of the job, known in advance so the receiver can remove
+    results it never got.
+    """
+    return f"{job.context}_{job.experiment}_{job.start}_{job.selection}"
+
+
+def base_name(context: str, experiment: int) -> str:
+    """
+    Name of shared memory segment with base populations of experiment's epochs (see population_dtype).
+    """
+    return f"{context}_base_{experiment}"
+
+
+def read_rows(name: str, shape: typing.Tuple[int, ...], dtype: np.dtype, start: int, stop: int) -> np.ndarray:
+    """
+    Copy of rows start ... stop - 1 of an array shared under the name, the segment stays in place.
+    """
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf)[start:stop].copy()
+    finally:
+        shm.close()
+
+
+def send_array(array: np.ndarray, name: str = None) -> typing.Union[np.ndarray, SharedArray]:
+    """
+    Array itself if it is small, otherwise its copy in a new shared memory segment.
+    :param name: Name of the segment, random if None
+    """
+    if array.nbytes < SHARED_ARRAY_MIN_BYTES:
+        return array
+
+    shm = shared_memory.SharedMemory(name=name, create=True, size=array.nbytes)
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    shm.close()
+
+    return SharedArray(shm.name, array.shape, array.dtype)
+
+
+def receive_array(payload: typing.Union[np.ndarray, SharedArray]) -> np.ndarray:
+    if not isinstance(payload, SharedArray):
+        return payload
+
+    shm = shared_memory.SharedMemory(name=payload.name)
+    try:
+        array = np.ndarray(payload.shape, dtype=payload.dtype, buffer=shm.buf).copy()
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return array
+
+
+def discard_array(name: str):
+    """
+    Removes segment of an array sent under the name but not received, if there is one.
+    """
+    try:
+        shm = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return
+
+    shm.close()
+    shm.unlink()
+
+
+def population_dtype(length: int) -> np.dtype:
+    """
+    Individual of a base population: packed genotype and its fitness.
+    """
+    return np.dtype([("genes", "u1", ((length + 7) // 8,)), ("fitness", "<f8")])
+
+
+def record_dtype(length: int) -> np.dtype:
+    """
+    Fixed layout of run stats: bit i of "present" is set if i-th of STATS_KEYS is in stats,
+    genotype is packed into ceil(length / 8) bytes.
+    """
+    return np.dtype(
+        [("present", "<u8")]
+        + [(key, "<i8") for key in INT_STATS]
+        + [(key, "<f8") for key in FLOAT_STATS]
+        + [("F", "u1", ((length + 7) // 8,))]
+    )
+
+
+def to_records(runs_stats: typing.Sequence[dict], length: int) -> np.ndarray:
+    records = np.zeros(len(runs_stats), dtype=record_dtype(length))
+
+    for index, stats in enumerate(runs_stats):
+        present = 0
+        for bit, key in enumerate(STATS_KEYS):
+            if key not in stats:
+                continue
+            present |= 1 << bit
+            if key == "F":
+                records["F"][index] = bit_population.from_genotypes([stats["F"]])[0]
+            else:
+                records[key][index] = stats[key]
+        records["present"][index] = present
+
+    return records
+
+
+def from_records(records: np.ndarray, length: int) -> typing.List[dict]:
+    genotypes = bit_population.to_genotypes(bit_population.unpack(records["F"], length))
+    runs_stats = []
+
+    for record, genotype in zip(records, genotypes):
+        present = int(record["present"])
+        stats = {}
+        for bit, key in enumerate(STATS_KEYS):
+            if not present >> bit & 1:
+                continue
+            if key == "F":
+                stats["F"] = genotype
+            elif key in INT_STATS:
+                stats[key] = int(record[key])
+            else:
+                stats[key] = float(record[key])
+        runs_stats.append(stats)
+
+    return runs_stats
@@ -1,3 +1,5 @@
+import numpy as np
+
 import models
 
 
@@ -9,10 +11,19 @@ class LinearRank(models.Function):
         self._n = n
 
     def _f(self, arg):
+        """
+        :param arg: Rank of individual, 0 for the worst one and n - 1 for the best one
+        """
         return (2 - self._beta) / self._n \
                + (2 * arg * (self._beta - 1)) \
                / (self._n * (self._n - 1))
 
+    def _f_array(self, args: np.ndarray) -> np.ndarray:
+        """
+        Takes ranks like _f, so scalars, lists and arrays of the same values are scaled the same way.
+        """
+        return self._f(np.asarray(args, dtype=np.float64))
+
 
 class LinearScaling(models.Function):
     def __init__(self, a: int, b: int):
@@ -24,3 +35,6 @@ class LinearScaling(models.Function):
     def _f(self, arg):
         res = self._a * arg + self._b
         return res if res > 0 else 0
+
+    def _f_array(self, args: np.ndarray) -> np.ndarray:
+        return np.maximum(self._a * args + self._b, 0)
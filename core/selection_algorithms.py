@@ -1,4 +1,4 @@
-import copy
+import functools
 import random
 import typing
 
@@ -6,53 +6,121 @@ import models
 import numpy as np
 
 
+def rws_indices(scaled_fitness: np.ndarray, pointers: np.ndarray) -> np.ndarray:
+    """
+    Maps pointers on the cumulative scaled fitness scale to individuals' indices:
+    index of the first individual whose cumulative scaled fitness reaches the pointer.
+    """
+    cumulative = np.cumsum(scaled_fitness)
+    return np.minimum(np.searchsorted(cumulative, pointers, side="left"), len(cumulative) - 1)
+
+
+def sus_indices(scaled_fitness: np.ndarray, rng: typing.Union[None, np.random.Generator] = None) -> np.ndarray:
+    """
+    Stochastic universal sampling: n equally spaced pointers with one random offset.
+    :param rng: Random generator, new unseeded one if None
+    :return: Indices of selected individuals
+    """
+    n = len(scaled_fitness)
+    p = np.sum(scaled_fitness) / n
+    start = (rng or np.random.default_rng()).uniform(0, p)
+    return rws_indices(scaled_fitness, start + np.arange(n) * p)
+
+
 def rws(
         population: models.Population, pointers: typing.List[float]
 ) -> models.Population:
-    keep = []
-    for p in pointers:
-        i = 0
-        # use individual's coeff of
-        sum_ = population.individuals[i].scaled_fitness
-        while sum_ < p:
-            i += 1
-            sum_ += population.individuals[i].scaled_fitness
-        keep.append(copy.copy(population.individuals[i]))
-    return models.Population(keep)
-
-def my_rws(population: models.Population):
-    try:
-        probabilities = [chromosome.scaled_fitness / population.scaled_fitness for chromosome in population.individuals]
-        keep = [np.random.choice(population.individuals, p=probabilities) for _ in range(0, len(population))]
-    except:
-        kijh = 2+2
-        print('asd')
-    kek = models.Population(keep)
-    return kek
-
-def my_sus(population: models.Population) -> models.Population:
-    f = population.scaled_fitness  # sum of all probabilities = 1
-    n = len(population)
-    p = f / n
-    start = random.uniform(0, p)
-    pointers = [start + i * p for i in range(n)]
-    return rws(population, pointers)
+    return population.take(rws_indices(np.asarray(population.scaled_fitness_arr), np.asarray(pointers)))
+
+def alias_table(weights: np.ndarray) -> typing.Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds Walker's alias table for sampling indices proportionally to weights, vectorized form of
+    Vose's method: deficits (1 - w) of small columns and excesses (w - 1) of large ones are laid
+    on one axis by cumulative sums, each column takes its alias from the large column whose excess
+    covers the point where its deficit starts. A large column whose excess runs out inside a deficit
+    becomes small and takes the rest from the next one.
+    :return: Acceptance probabilities and aliases for each index
+    """
+    n = len(weights)
+    total = np.sum(weights)
+    # all individuals have zero scaled fitness - every one is equally likely
+    scaled = np.asarray(weights, dtype=np.float64) * n / total if total > 0 else np.ones(n)
+
+    prob = np.ones(n)
+    alias = np.arange(n)
+    small = np.flatnonzero(scaled < 1)
+    large = np.flatnonzero(scaled >= 1)
+    if not len(small) or not len(large):
+        return prob, alias
+
+    deficit_end = np.cumsum(1 - scaled[small])
+    deficit_start = deficit_end - (1 - scaled[small])
+    excess_end = np.cumsum(scaled[large] - 1)
+
+    def donors(points: np.ndarray) -> np.ndarray:
+        # rounding can put the last points past the total excess
+        return large[np.minimum(np.searchsorted(excess_end, points, side="right"), len(large) - 1)]
+
+    prob[small] = scaled[small]
+    alias[small] = donors(deficit_start)
+
+    # large columns whose excess ends strictly inside a deficit, columns exactly at the mean have
+    # no excess to run out of and keep prob 1
+    inside = np.searchsorted(deficit_end, excess_end, side="right")
+    overdrawn = (inside < len(small)) & (scaled[large] > 1)
+    overdrawn[overdrawn] = deficit_start[inside[overdrawn]] < excess_end[overdrawn]
+    prob[large[overdrawn]] = 1 - (deficit_end[inside[overdrawn]] - excess_end[overdrawn])
+    alias[large[overdrawn]] = donors(excess_end[overdrawn])
+
+    return prob, alias
+
+
+def alias_indices(
+        prob: np.ndarray, alias: np.ndarray, size: int, rng: typing.Union[None, np.random.Generator] = None
+) -> np.ndarray:
+    """
+    Draws size indices from alias table in one vectorized batch, O(1) per sample.
+    :param rng: Random generator, new unseeded one if None
+    """
+    rng = rng or np.random.default_rng()
+    columns = rng.integers(0, len(prob), size)
+    return np.where(rng.random(size) < prob[columns], columns, alias[columns])
+
+
+def my_rws(
+        population: models.Population, rng: typing.Union[None, np.random.Generator] = None
+) -> models.Population:
+    prob, alias = alias_table(np.asarray(population.scaled_fitness_arr))
+    return population.take(alias_indices(prob, alias, len(population), rng))
+
+
+# draws from random generator of the algorithm, so runs follow its seed
+my_rws.takes_rng = True
+
+
+def my_sus(
+        population: models.Population, rng: typing.Union[None, np.random.Generator] = None
+) -> models.Population:
+    return population.take(sus_indices(np.asarray(population.scaled_fitness_arr), rng))
+
+
+my_sus.takes_rng = True
 
 
 def sus(population: models.Population) -> models.Population:
     total_fitness = 0
     fitness_scale = []
-    for index, individual in enumerate(population.individuals):
-        total_fitness += individual.scaled_fitness
+    for index, scaled_fitness in enumerate(population.scaled_fitness_arr):
+        total_fitness += scaled_fitness
         if index == 0:
-            fitness_scale.append(individual.scaled_fitness)
+            fitness_scale.append(scaled_fitness)
         else:
-            fitness_scale.append(individual.scaled_fitness + fitness_scale[index - 1])
+            fitness_scale.append(scaled_fitness + fitness_scale[index - 1])
 
     # Store the selected parents
     mating_pool = []
     # Equal to the size of the population
-    number_of_parents = len(population.individuals)
+    number_of_parents = len(population)
     # How fast we move along the fitness scale
     fitness_step = total_fitness / number_of_parents
     random_offset = random.uniform(0, fitness_step)
@@ -62,12 +130,70 @@ def sus(population: models.Population) -> models.Population:
     # - pick the parent who corresponds to the current pointer position and add them to the mating pool
     current_fitness_pointer = random_offset
     last_fitness_scale_position = 0
-    for index in range(len(population.individuals)):
+    for index in range(len(population)):
         for fitness_scale_position in range(last_fitness_scale_position, len(fitness_scale)):
             if fitness_scale[fitness_scale_position] >= current_fitness_pointer:
-                mating_pool.append(population.individuals[fitness_scale_position])
+                mating_pool.append(fitness_scale_position)
                 last_fitness_scale_position = fitness_scale_position
                 break
         current_fitness_pointer += fitness_step
 
-    return models.Population(mating_pool)
+    return population.take(mating_pool)
+
+
+def tournament_indices(
+        fitness: np.ndarray, k: int = 2, replace: bool = True, rng: typing.Union[None, np.random.Generator] = None
+) -> np.ndarray:
+    """
+    Tournament selection on raw fitness, all n tournaments are drawn as one (n, k) index matrix.
+    :param fitness: Raw fitness of individuals
+    :param k: Tournament size
+    :param replace: If True contestants are drawn independently, otherwise population is shuffled
+    and split into groups of k, so no individual meets itself. Shuffles are repeated until there
+    are n groups; each individual enters exactly k tournaments if k divides n, otherwise n % k
+    individuals of every shuffle sit out
+    :param rng: Random generator, new unseeded one if None
+    :return: Indices of tournament winners
+    """
+    n = len(fitness)
+    rng = rng or np.random.default_rng()
+
+    if replace:
+        contestants = rng.integers(0, n, (n, k))
+    else:
+        groups = n // k
+        if not groups:
+            raise ValueError(f"Tournament of size {k} without replacement needs at least {k} individuals, got {n}")
+        shuffles = rng.permuted(np.tile(np.arange(n), (-(-n // groups), 1)), axis=1)
+        contestants = shuffles[:, :groups * k].reshape(-1, k)[:n]
+
+    winners = np.argmax(np.asarray(fitness)[contestants], axis=1)
+    return contestants[np.arange(n), winners]
+
+
+def tournament(
+        population: models.Population, k: int = 2, replace: bool = True,
+        rng: typing.Union[None, np.random.Generator] = None,
+) -> models.Population:
+    return population.take(tournament_indices(population.fitness_arr, k, replace, rng))
+
+
+# works on raw fitness, so population doesn't have to be scaled (and sorted) before selection
+tournament.uses_scaled_fitness = False
+tournament.takes_rng = True
+binary_tournament = functools.partial(tournament, k=2)
+binary_tournament_no_replacement = functools.partial(tournament, k=2, replace=False)
+
+
+def uses_scaled_fitness(selection_algo: typing.Callable) -> bool:
+    """
+    Checks if selection algorithm (or functools.partial of it) reads scaled fitness.
+    """
+    return getattr(getattr(selection_algo, "func", selection_algo), "uses_scaled_fitness", True)
+
+
+def takes_rng(selection_algo: typing.Callable) -> bool:
+    """
+    Checks if selection algorithm (or functools.partial of it) accepts random generator as rng argument.
+    """
+    return getattr(getattr(selection_algo, "func", selection_algo), "takes_rng", False)
@@ -1,22 +1,37 @@
 import collections
 import math
-import random
+import typing
 
 import matplotlib.pyplot as plt
 import numpy as np
 
+from core import metrics
+from models import bit_population
 
-def generate_norm_dist(low, high, length):
+
+def truncated_normal(low, high, length, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Normal distribution centered in the middle of [low, high] and truncated to it.
+    Values out of range are redrawn (std is 1/10 of range, so almost nothing is redrawn).
+    """
+    rng = rng or np.random.default_rng()
     variation = abs(low - high) / 2
     std_dev = variation / 5  # 4
     mean = (low + high) / 2
-    dist = np.random.normal(mean, std_dev, length)
-    dist = list(filter(lambda x: low <= x <= high, dist))
-    for _ in range(length - len(dist)):
-        dist.append(random.choice(dist))
+
+    dist = rng.normal(mean, std_dev, length)
+    outside = np.flatnonzero((dist < low) | (dist > high))
+    while len(outside):
+        dist[outside] = rng.normal(mean, std_dev, len(outside))
+        outside = outside[(dist[outside] < low) | (dist[outside] > high)]
+
     return dist
 
 
+def generate_norm_dist(low, high, length):
+    return truncated_normal(low, high, length).tolist()
+
+
 def round_half_up(n, decimals=0):
     multiplier = 10 ** decimals
     return math.floor(n * multiplier + 0.5) / multiplier
@@ -30,6 +45,11 @@ def encode_sampling(a, b, x, m):
     return int(((x - a) / (b - a)) * (2 ** m - 1))
 
 
+def encode_sampling_array(a, b, x, m):
+    # truncation towards zero, same as int() in encode_sampling
+    return np.trunc(((np.asarray(x, dtype=np.float64) - a) / (b - a)) * (2 ** m - 1)).astype(np.int64)
+
+
 def get_bin(x, n=0):
     """
     Get the binary representation of x.
@@ -88,204 +108,227 @@ def encode_binary(x, a, b, m):
     return get_bin(x, m)
 
 
-def aggregate_runs_data(
-        runs_data: list, stats_mode: str, optimal: str, fitness_fn
-) -> dict:
-    total_data = collections.defaultdict(dict)
-    result = {}
+def bits_to_ints(bits: np.ndarray) -> np.ndarray:
+    """
+    Reads each row of (n, m) matrix of 0/1 values as binary integer (most significant bit first).
+    """
+    m = bits.shape[1]
+    return bits.astype(np.int64) @ (np.int64(1) << np.arange(m - 1, -1, -1, dtype=np.int64))
 
-    for epoch_data in runs_data:
-        for selection_fn in epoch_data:
-            if selection_fn not in total_data:
-                total_data[selection_fn] = collections.defaultdict(list)
-
-            if stats_mode == "full":
-                if epoch_data[selection_fn]["NI"] == -1:
-                    total_data[selection_fn]["Suc"].append(False)
-                    print("ERROR --- RUN WAS NOT SUCCESSFUL, POPULATION WAS NOT CONVERGENCE")
-                    continue
-
-                if fitness_fn.is_arg_real():
-                    x_val = fitness_fn.decode(optimal)
-                    y_val = fitness_fn(optimal)
-                    x_found = fitness_fn.decode(epoch_data[selection_fn]["F"])
-                    y_found = fitness_fn(epoch_data[selection_fn]["F"])
-
-                    if abs(x_found - x_val) > 0.01 or y_found < y_val - 0.01:
-                        total_data[selection_fn]["Suc"].append(False)
-                        print("ERROR --- RUN WAS NOT SUCCESSFUL, REAL ARG DONT MEET OPTIMAL CONDITIONS")
-                        continue
-
-                else:
-                    if epoch_data[selection_fn]["F"] != optimal:
-                        total_data[selection_fn]["Suc"].append(False)
-                        print("ERROR --- RUN WAS NOT SUCCESSFUL, POPULATION WAS NOT OPTIMAL")
-                        continue
-
-                total_data[selection_fn]["Suc"].append(True)
-
-            else:
-                total_data[selection_fn]["Suc"].append(epoch_data[selection_fn]["NI"] != -1)
-
-            total_data[selection_fn]["NI"].append(epoch_data[selection_fn]["NI"])
-
-            if stats_mode == "noise":
-                total_data[selection_fn]["Num0"].append(epoch_data[selection_fn]["ConvTo"] == 0)
-                total_data[selection_fn]["Num1"].append(epoch_data[selection_fn]["ConvTo"] == 1)
-
-                # rr
-                total_data[selection_fn]["RR_min"].append(epoch_data[selection_fn]["RR_min"])
-                total_data[selection_fn]["NI_RR_min"].append(epoch_data[selection_fn]["NI_RR_min"])
-                total_data[selection_fn]["RR_max"].append(epoch_data[selection_fn]["RR_max"])
-                total_data[selection_fn]["NI_RR_max"].append(epoch_data[selection_fn]["NI_RR_max"])
-                total_data[selection_fn]["RR_avg"].append(epoch_data[selection_fn]["RR_avg"])
-                # loss of diversity
-                total_data[selection_fn]["Teta_min"].append(epoch_data[selection_fn]["Teta_min"])
-                total_data[selection_fn]["NI_Teta_min"].append(epoch_data[selection_fn]["NI_Teta_min"])
-                total_data[selection_fn]["Teta_max"].append(epoch_data[selection_fn]["Teta_max"])
-                total_data[selection_fn]["NI_Teta_max"].append(epoch_data[selection_fn]["NI_Teta_max"])
-                total_data[selection_fn]["Teta_avg"].append(epoch_data[selection_fn]["Teta_avg"])
-            else:
-                # intensity
-                total_data[selection_fn]["I_min"].append(epoch_data[selection_fn]["I_min"])
-                total_data[selection_fn]["NI_I_min"].append(epoch_data[selection_fn]["NI_I_min"])
-                total_data[selection_fn]["I_max"].append(epoch_data[selection_fn]["I_max"])
-                total_data[selection_fn]["NI_I_max"].append(epoch_data[selection_fn]["NI_I_max"])
-                total_data[selection_fn]["I_avg"].append(epoch_data[selection_fn]["I_avg"])
-                # growth rate
-                total_data[selection_fn]["GR_avg"].append(epoch_data[selection_fn]["GR_avg"])
-                total_data[selection_fn]["GR_early"].append(epoch_data[selection_fn]["GR_early"])
-                total_data[selection_fn]["GR_late"].append(epoch_data[selection_fn].get("GR_late", 1.03))
-                # rr
-                total_data[selection_fn]["RR_min"].append(epoch_data[selection_fn]["RR_min"])
-                total_data[selection_fn]["NI_RR_min"].append(epoch_data[selection_fn]["NI_RR_min"])
-                total_data[selection_fn]["RR_max"].append(epoch_data[selection_fn]["RR_max"])
-                total_data[selection_fn]["NI_RR_max"].append(epoch_data[selection_fn]["NI_RR_max"])
-                total_data[selection_fn]["RR_avg"].append(epoch_data[selection_fn]["RR_avg"])
-                # loss of diversity
-                total_data[selection_fn]["Teta_min"].append(epoch_data[selection_fn]["Teta_min"])
-                total_data[selection_fn]["NI_Teta_min"].append(epoch_data[selection_fn]["NI_Teta_min"])
-                total_data[selection_fn]["Teta_max"].append(epoch_data[selection_fn]["Teta_max"])
-                total_data[selection_fn]["NI_Teta_max"].append(epoch_data[selection_fn]["NI_Teta_max"])
-                total_data[selection_fn]["Teta_avg"].append(epoch_data[selection_fn]["Teta_avg"])
-                # selection difference
-                total_data[selection_fn]["s_min"].append(epoch_data[selection_fn]["s_min"])
-                total_data[selection_fn]["NI_s_min"].append(epoch_data[selection_fn]["NI_s_min"])
-                total_data[selection_fn]["s_max"].append(epoch_data[selection_fn]["s_max"])
-                total_data[selection_fn]["NI_s_max"].append(epoch_data[selection_fn]["NI_s_max"])
-                total_data[selection_fn]["s_avg"].append(epoch_data[selection_fn]["s_avg"])
-
-    for key in total_data:
-        data = total_data[key]
-        total = len(data["Suc"])
-        suc = sum(data["Suc"])
-
-        if not suc:
+
+def ints_to_bits(x: np.ndarray, m: int) -> np.ndarray:
+    """
+    Binary representation of each integer as row of (n, m) matrix of 0/1 values.
+    """
+    shifts = np.arange(m - 1, -1, -1, dtype=np.int64)
+    return ((np.asarray(x, dtype=np.int64)[:, None] >> shifts) & 1).astype(np.uint8)
+
+
+def encode_gray_array(x: np.ndarray) -> np.ndarray:
+    return x ^ (x >> 1)
+
+
+def decode_gray_array(x: np.ndarray) -> np.ndarray:
+    x = np.array(x, dtype=np.int64)
+    shift = 1
+
+    while shift < 64:
+        x ^= x >> shift
+        shift <<= 1
+
+    return x
+
+
+def encode_gray_bits(bits: np.ndarray) -> np.ndarray:
+    gray = bits.copy()
+    gray[:, 1:] ^= bits[:, :-1]
+    return gray
+
+
+def decode_gray_bits(bits: np.ndarray) -> np.ndarray:
+    # prefix XOR along each row
+    return np.bitwise_xor.accumulate(bits, axis=1)
+
+
+def decode_array(bits, a, b, m):
+    return decode_sampling(a, b, bits_to_ints(decode_gray_bits(bits)), m)
+
+
+def encode_array(x, a, b, m):
+    x = encode_sampling_array(a, b, x, m)
+    return encode_gray_bits(ints_to_bits(x, m))
+
+
+def decode_binary_array(bits, a, b, m):
+    return decode_sampling(a, b, bits_to_ints(bits), m)
+
+
+def encode_binary_array(x, a, b, m):
+    return ints_to_bits(encode_sampling_array(a, b, x, m), m)
+
+
+class RunsAggregator:
+    """
+    Aggregates stats of runs as they finish: every metric is kept as metrics.RunningStats,
+    so memory doesn't depend on number of runs. Aggregators of separate workers are combined with merge().
+    """
+
+    # metric -> stats key of its iteration (for min and max)
+    FULL_METRICS = {
+        "I_min": "NI_I_min", "I_max": "NI_I_max", "I_avg": None,
+        "GR_avg": None, "GR_early": None, "GR_late": None,
+        "RR_min": "NI_RR_min", "RR_max": "NI_RR_max", "RR_avg": None,
+        "Teta_min": "NI_Teta_min", "Teta_max": "NI_Teta_max", "Teta_avg": None,
+        "s_min": "NI_s_min", "s_max": "NI_s_max", "s_avg": None,
+    }
+
+    def __init__(self, stats_mode: str, optimal: str, fitness_fn):
+        self._stats_mode: str = stats_mode
+        self._optimal: str = optimal
+        self._fitness_fn = fitness_fn
+        # selection fn -> number of runs, successful runs and (noise) convergences to 0 and 1
+        self._counters: typing.Dict[str, collections.Counter] = {}
+        # selection fn -> metric -> its stats over runs
+        self._metrics: typing.Dict[str, typing.Dict[str, metrics.RunningStats]] = {}
+        # genotype -> (x, fitness)
+        self._decoded: typing.Dict[str, typing.Tuple[float, float]] = {}
+
+    def _decode(self, genotypes: typing.List[str]):
+        """
+        Decodes not yet decoded genotypes in one batch.
+        """
+        missing = list({genotype for genotype in genotypes if genotype not in self._decoded})
+        if not missing:
+            return
+
+        bits = bit_population.to_bits(missing)
+        self._decoded.update(zip(missing, zip(self._fitness_fn.decode_bits(bits), self._fitness_fn.evaluate_bits(bits))))
+
+    def _is_successful(self, run_data: dict) -> bool:
+        if self._stats_mode != "full":
+            return run_data["NI"] != -1
+
+        if run_data["NI"] == -1:
+            print("ERROR --- RUN WAS NOT SUCCESSFUL, POPULATION WAS NOT CONVERGENCE")
+            return False
+
+        if self._fitness_fn.is_arg_real():
+            x_val, y_val = self._decoded[self._optimal]
+            x_found, y_found = self._decoded[run_data["F"]]
+
+            if abs(x_found - x_val) > 0.01 or y_found < y_val - 0.01:
+                print("ERROR --- RUN WAS NOT SUCCESSFUL, REAL ARG DONT MEET OPTIMAL CONDITIONS")
+                return False
+
+        elif run_data["F"] != self._optimal:
+            print("ERROR --- RUN WAS NOT SUCCESSFUL, POPULATION WAS NOT OPTIMAL")
+            return False
+
+        return True
+
+    def add(self, epoch_data: dict):
+        """
+        :param epoch_data: Stats of one run for each selection function
+        """
+        if self._stats_mode == "full" and self._fitness_fn.is_arg_real():
+            self._decode([self._optimal] + [
+                run_data["F"] for run_data in epoch_data.values() if run_data["NI"] != -1
+            ])
+
+        for selection_fn, run_data in epoch_data.items():
+            counter = self._counters.setdefault(selection_fn, collections.Counter())
+            stats = self._metrics.setdefault(selection_fn, {})
+
+            counter["runs"] += 1
+            successful = self._is_successful(run_data)
+            counter["Suc"] += successful
+            if self._stats_mode == "full" and not successful:
+                continue
+
+            stats.setdefault("NI", metrics.RunningStats()).add(run_data["NI"])
+
+            if self._stats_mode == "noise":
+                counter["Num0"] += run_data["ConvTo"] == 0
+                counter["Num1"] += run_data["ConvTo"] == 1
+                continue
+
+            for key, ni_key in self.FULL_METRICS.items():
+                value = run_data.get("GR_late", 1.03) if key == "GR_late" else run_data[key]
+                stats.setdefault(key, metrics.RunningStats()).add(value, run_data[ni_key] if ni_key else None)
+
+    def merge(self, other: "RunsAggregator") -> "RunsAggregator":
+        for selection_fn, counter in other._counters.items():
+            self._counters.setdefault(selection_fn, collections.Counter()).update(counter)
+        for selection_fn, other_stats in other._metrics.items():
+            stats = self._metrics.setdefault(selection_fn, {})
+            for key, value in other_stats.items():
+                stats.setdefault(key, metrics.RunningStats()).merge(value)
+
+        return self
+
+    @staticmethod
+    def _extremes(stats: typing.Dict[str, metrics.RunningStats], key: str, sigma: bool = True) -> dict:
+        low, high, avg = stats[f"{key}_min"], stats[f"{key}_max"], stats[f"{key}_avg"]
+        result = {
+            f"Min_{key}_min": low.min, f"NI_{key}_min": low.argmin,
+            f"Max_{key}_max": high.max, f"NI_{key}_max": high.argmax,
+            f"Avg_{key}_min": low.mean, f"Avg_{key}_max": high.mean, f"Avg_{key}_avg": avg.mean,
+        }
+        if sigma:
+            result.update({f"Sigma_{key}_max": high.std, f"Sigma_{key}_min": low.std, f"Sigma_{key}_avg": avg.std})
+
+        return result
+
+    def result(self) -> dict:
+        result = {}
+
+        for key, counter in self._counters.items():
+            total = counter["runs"]
+            suc = counter["Suc"]
+
+            if not suc:
+                result[key] = {
+                    "Suc": suc / total,
+                }
+                continue
+
+            stats = self._metrics[key]
             result[key] = {
                 "Suc": suc / total,
+                "Min_NI": stats["NI"].min,
+                "Max_NI": stats["NI"].max,
+                "Avg_NI": stats["NI"].mean,
+                "Sigma_NI": stats["NI"].std
             }
-            continue
-
-        result[key] = {
-            "Suc": suc / total,
-            "Min_NI": min(data["NI"]),
-            "Max_NI": max(data["NI"]),
-            "Avg_NI": np.mean(data["NI"]),
-            "Sigma_NI": np.std(data["NI"])
-        }
 
-        if stats_mode == "noise":
-            num0 = sum(data["Num0"])
-            num1 = sum(data["Num1"])
-
-            result[key].update({
-                "Num0": num0 / total,
-                "Num1": num1 / total,
-            })
-        else:
-            # intensity
-            min_i_min = min(data["I_min"])
-            ni_i_min = data["NI_I_min"][data["I_min"].index(min_i_min)]
-            max_i_max = max(data["I_max"])
-            ni_i_max = data["NI_I_max"][data["I_max"].index(max_i_max)]
-
-            avg_i_min = np.mean(data["I_min"])
-            avg_i_max = np.mean(data["I_max"])
-            avg_i_avg = np.mean(data["I_avg"])
-
-            std_i_min = np.std(data["I_min"])
-            std_i_max = np.std(data["I_max"])
-            std_i_avg = np.std(data["I_avg"])
-
-            # growth rate
-            avg_gr_early = np.mean(data["GR_early"])
-            min_gr_early = min(data["GR_early"])
-            max_gr_early = max(data["GR_early"])
-
-            avg_gr_late = np.mean(data["GR_late"])
-            min_gr_late = min(data["GR_late"])
-            max_gr_late = max(data["GR_late"])
-
-            avg_gr_avg = np.mean(data["GR_avg"])
-            min_gr_avg = min(data["GR_avg"])
-            max_gr_avg = max(data["GR_avg"])
-
-            # rr
-            min_rr_min = min(data["RR_min"])
-            ni_rr_min = data["NI_RR_min"][data["RR_min"].index(min_rr_min)]
-            max_rr_max = max(data["RR_max"])
-            ni_rr_max = data["NI_RR_max"][data["RR_max"].index(max_rr_max)]
-
-            avg_rr_min = np.mean(data["RR_min"])
-            avg_rr_max = np.mean(data["RR_max"])
-            avg_rr_avg = np.mean(data["RR_avg"])
-
-            std_rr_min = np.std(data["RR_min"])
-            std_rr_max = np.std(data["RR_max"])
-            std_rr_avg = np.std(data["RR_avg"])
-
-            # loss of diversity
-            min_teta_min = min(data["Teta_min"])
-            ni_teta_min = data["NI_Teta_min"][data["Teta_min"].index(min_teta_min)]
-            max_teta_max = max(data["Teta_max"])
-            ni_teta_max = data["NI_Teta_max"][data["Teta_max"].index(max_teta_max)]
-
-            avg_teta_min = np.mean(data["Teta_min"])
-            avg_teta_max = np.mean(data["Teta_max"])
-            avg_teta_avg = np.mean(data["Teta_avg"])
-
-            std_teta_min = np.std(data["Teta_min"])
-            std_teta_max = np.std(data["Teta_max"])
-            std_teta_avg = np.std(data["Teta_avg"])
-
-            # selection difference
-            min_s_min = min(data["s_min"])
-            ni_s_min = data["NI_s_min"][data["s_min"].index(min_s_min)]
-            max_s_max = max(data["s_max"])
-            ni_s_max = data["NI_s_max"][data["s_max"].index(max_s_max)]
-
-            avg_s_min = np.mean(data["s_min"])
-            avg_s_max = np.mean(data["s_max"])
-            avg_s_avg = np.mean(data["s_avg"])
-
-            result[key].update({
-                "Min_I_min": min_i_min, "NI_I_min": ni_i_min, "Max_I_max": max_i_max,
-                "NI_I_max": ni_i_max, "Avg_I_min": avg_i_min, "Avg_I_max": avg_i_max, "Avg_I_avg": avg_i_avg,
-                "Sigma_I_max": std_i_max, "Sigma_I_min": std_i_min, "Sigma_I_avg": std_i_avg,
-                "AvgGR_early": avg_gr_early, "MinGR_early": min_gr_early, "MaxGR_early": max_gr_early,
-                "AvgGR_late": avg_gr_late, "MinGR_late": min_gr_late, "MaxGR_late": max_gr_late,
-                "AvgGR_avg": avg_gr_avg, "MinGR_avg": min_gr_avg, "MaxGR_avg": max_gr_avg,
-                "Min_RR_min": min_rr_min, "NI_RR_min": ni_rr_min, "Max_RR_max": max_rr_max,
-                "NI_RR_max": ni_rr_max, "Avg_RR_min": avg_rr_min, "Avg_RR_max": avg_rr_max, "Avg_RR_avg": avg_rr_avg,
-                "Sigma_RR_max": std_rr_max, "Sigma_RR_min": std_rr_min, "Sigma_RR_avg": std_rr_avg,
-                "Min_Teta_min": min_teta_min, "NI_Teta_min": ni_teta_min, "Max_Teta_max": max_teta_max,
-                "NI_Teta_max": ni_teta_max, "Avg_Teta_min": avg_teta_min, "Avg_Teta_max": avg_teta_max,
-                "Avg_Teta_avg": avg_teta_avg, "Sigma_Teta_max": std_teta_max, "Sigma_Teta_min": std_teta_min,
-                "Sigma_Teta_avg": std_teta_avg, "Min_s_min": min_s_min, "NI_s_min": ni_s_min, "Max_s_max": max_s_max,
-                "NI_s_max": ni_s_max, "Avg_s_min": avg_s_min, "Avg_s_max": avg_s_max, "Avg_s_avg": avg_s_avg
-            })
-
-    return result
+            if self._stats_mode == "noise":
+                result[key].update({
+                    "Num0": counter["Num0"] / total,
+                    "Num1": counter["Num1"] / total,
+                })
+                continue
+
+            result[key].update(self._extremes(stats, "I"))
+            for gr in ("early", "late", "avg"):
+                gr_stats = stats[f"GR_{gr}"]
+                result[key].update({
+                    f"AvgGR_{gr}": gr_stats.mean, f"MinGR_{gr}": gr_stats.min, f"MaxGR_{gr}": gr_stats.max
+                })
+            result[key].update(self._extremes(stats, "RR"))
+            result[key].update(self._extremes(stats, "Teta"))
+            result[key].update(self._extremes(stats, "s", sigma=False))
+
+        return result
+
+
+def aggregate_runs_data(
+        runs_data: list, stats_mode: str, optimal: str, fitness_fn
+) -> dict:
+    aggregator = RunsAggregator(stats_mode, optimal, fitness_fn)
+    for epoch_data in runs_data:
+        aggregator.add(epoch_data)
+
+    return aggregator.result()
 
 
 def _draw(
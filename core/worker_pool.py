@@ -0,0 +1,183 @@
+import contextlib
+import importlib
+import importlib.util
+import multiprocessing
+import os
+import queue
+import time
+import typing
+import warnings
+
+# environment variables read by native thread pools (BLAS, OpenMP) when their library is loaded
+THREAD_LIMIT_VARIABLES = (
+    "OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "BLIS_NUM_THREADS", "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+)
+# modules every worker needs, imported once in forkserver or in each worker otherwise
+PRELOAD_DEFAULT = ("numpy", "core.fitness_functions", "core.genetic_algorithm", "core.batched_genetic_algorithm")
+# seconds start waits for every worker to finish its initializer
+STARTUP_TIMEOUT = 120
+
+
+@contextlib.contextmanager
+def _limited_environment(threads: typing.Union[None, int]):
+    """
+    Sets thread limits in environment while processes started inside inherit it, restores it afterwards.
+    """
+    if threads is None:
+        yield
+        return
+
+    saved = {name: os.environ.get(name) for name in THREAD_LIMIT_VARIABLES}
+    os.environ.update({name: str(threads) for name in THREAD_LIMIT_VARIABLES})
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+def _init_worker(threads: typing.Union[None, int], preload: typing.Sequence[str], ready):
+    """
+    Reports (pid, None) when worker is ready or (pid, error) instead of raising,
+    pool would respawn a failing worker forever.
+    """
+    try:
+        if threads is not None:
+            os.environ.update({name: str(threads) for name in THREAD_LIMIT_VARIABLES})
+            # libraries loaded before the worker was forked ignore environment, threadpoolctl (if installed) limits them
+            try:
+                import threadpoolctl
+                threadpoolctl.threadpool_limits(threads)
+            except ImportError:
+                pass
+
+        for module in preload:
+            importlib.import_module(module)
+    except Exception as e:
+        ready.put((os.getpid(), f"{type(e).__name__}: {e}"))
+        return
+
+    ready.put((os.getpid(), None))
+
+
+class WorkerPool:
+    """
+    Process pool started once and reused by any number of evaluations (and evaluators) until closed.
+    Workers cap native thread pools, so cpu_count processes don't oversubscribe the machine,
+    and import heavy modules before the first task. With "forkserver" start method the modules
+    are imported once in the server and every worker is forked from it already loaded.
+    """
+
+    def __init__(
+            self, processes: int, start_method: typing.Union[None, str] = None,
+            threads_per_worker: typing.Union[None, int] = 1, preload: typing.Sequence[str] = PRELOAD_DEFAULT,
+    ):
+        """
+        :param processes: Number of worker processes
+        :param start_method: "fork", "spawn" or "forkserver", platform default if None
+        :param threads_per_worker: Limit of native threads in each worker, no limit if None
+        :param preload: Modules imported by workers before the first task
+        """
+        self._processes: int = processes
+        self._start_method: typing.Union[None, str] = start_method
+        self._threads_per_worker: typing.Union[None, int] = threads_per_worker
+        self._preload: typing.Tuple[str, ...] = tuple(preload)
+
+        self._pool = None
+        self._startup_time: typing.Union[None, float] = None
+
+    @property
+    def processes(self) -> int:
+        return self._processes
+
+    @property
+    def startup_time(self) -> typing.Union[None, float]:
+        """
+        Seconds from start until every worker finished its initializer, None if not started.
+        """
+        return self._startup_time
+
+    @property
+    def started(self) -> bool:
+        return self._pool is not None
+
+    def start(self) -> "WorkerPool":
+        if self._pool is not None:
+            return self
+
+        context = multiprocessing.get_context(self._start_method)
+        if context.get_start_method() == "forkserver":
+            context.set_forkserver_preload(list(self._preload))
+        # forked workers inherit thread pools of libraries the parent has loaded, environment can't resize them
+        if (
+                self._threads_per_worker is not None and context.get_start_method() == "fork"
+                and importlib.util.find_spec("threadpoolctl") is None
+        ):
+            warnings.warn(
+                f"threads_per_worker={self._threads_per_worker} is not applied to forked workers without "
+                f"threadpoolctl, install it or use 'forkserver' or 'spawn' start method"
+            )
+
+        start = time.monotonic()
+        ready = context.Queue()
+        with _limited_environment(self._threads_per_worker):
+            self._pool = context.Pool(
+                self._processes, initializer=_init_worker, initargs=(self._threads_per_worker, self._preload, ready)
+            )
+            try:
+                for _ in range(self._processes):
+                    pid, error = ready.get(timeout=STARTUP_TIMEOUT)
+                    if error is not None:
+                        raise RuntimeError(f"Worker {pid} failed to initialize: {error}")
+            except queue.Empty:
+                self.terminate()
+                raise RuntimeError(f"Workers did not initialize in {STARTUP_TIMEOUT}s") from None
+            except BaseException:
+                self.terminate()
+                raise
+        self._startup_time = time.monotonic() - start
+
+        print(
+            f"Started {self._processes} workers ({context.get_start_method()}, "
+            f"threads per worker: {self._threads_per_worker or 'unlimited'}) in {self._startup_time:.3f}s"
+        )
+
+        return self
+
+    def imap_unordered(self, func: typing.Callable, iterable: typing.Iterable, chunksize: int = 1) -> typing.Iterator:
+        return self.start()._pool.imap_unordered(func, iterable, chunksize)
+
+    def close(self):
+        """
+        Waits for running tasks and stops workers.
+        """
+        if self._pool is None:
+            return
+
+        self._pool.close()
+        self._pool.join()
+        self._pool = None
+
+    def terminate(self):
+        """
+        Stops workers at once, queued and running tasks are dropped.
+        """
+        if self._pool is None:
+            return
+
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+
+    def __enter__(self) -> "WorkerPool":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.terminate()
+        else:
+            self.close()
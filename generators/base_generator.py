@@ -1,6 +1,10 @@
 import abc
 import typing
 
+import numpy as np
+
+from models import bit_population
+
 
 class BaseGeneratorException(Exception):
     """
@@ -15,7 +19,8 @@ class BaseGenerator:
     """
 
     def __init__(
-            self, *, n: int, length: int, optimal: str, generate_optimal: bool = False, **kwargs
+            self, *, n: int, length: int, optimal: str, generate_optimal: bool = False,
+            rng: typing.Union[np.random.Generator, None] = None, **kwargs
     ):
         """
         Initialize population generator
@@ -23,11 +28,13 @@ class BaseGenerator:
         :param length: Length of each individual in population
         :param optimal: Flag to generate optimal individual
         at first place in population
+        :param rng: Random generator for bulk generation
         """
         self._n: int = n
         self._length: int = length
         self._optimal: str = optimal
         self._generate_optimal: bool = generate_optimal
+        self._rng: np.random.Generator = rng or np.random.default_rng()
 
     @property
     def n(self) -> int:
@@ -68,16 +75,33 @@ class BaseGenerator:
         """
         return self._optimal
 
-    def generate_population(self) -> typing.List[str]:
+    def _generate_bits(self, n: int) -> np.ndarray:
         """
-        Generates new population.
-        :return: Population (list of strings/individuals)
+        Generates n individuals at once.
+        :return: (n, length) matrix of 0/1 values
+        """
+        return bit_population.to_bits([self.generate_individual() for _ in range(n)])
+
+    def generate_bits(self) -> np.ndarray:
+        """
+        Generates new population at once, optimal individual (if requested) is at first place.
+        :return: Population as (n, length) matrix of 0/1 values
         """
-        optimal = []
-        n = self._n
+        bits = np.empty((self._n, self._length), dtype=np.uint8)
+        start = 0
 
         if self._generate_optimal:
-            optimal.append(self.generate_optimal_individual())
-            n = self._n - 1
+            bits[0] = bit_population.to_bits([self.generate_optimal_individual()])[0]
+            start = 1
 
-        return optimal + [self.generate_individual() for _ in range(n)]
+        if start < self._n:
+            bits[start:] = self._generate_bits(self._n - start)
+
+        return bits
+
+    def generate_population(self) -> typing.List[str]:
+        """
+        Generates new population.
+        :return: Population (list of strings/individuals)
+        """
+        return bit_population.to_genotypes(self.generate_bits())
@@ -1,11 +1,18 @@
 import random
 
+import numpy as np
+
 from generators import base_generator
 
 
 class ConstGenerator(base_generator.BaseGenerator):
     def generate_optimal_individual(self) -> str:
-        return self.generate_individual()
+        # drawn from the generator's stream, so the same seed gives the same population
+        return ("0" if self._rng.random() < 0.5 else "1") * self._length
 
     def generate_individual(self) -> str:
         return ("0" if random.random() < 0.5 else "1") * self._length
+
+    def _generate_bits(self, n: int) -> np.ndarray:
+        ones = self._rng.random(n) >= 0.5
+        return np.repeat(ones[:, None], self._length, axis=1).astype(np.uint8)
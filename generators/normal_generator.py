@@ -1,5 +1,7 @@
 import random
 
+import numpy as np
+
 from generators import base_generator
 
 
@@ -14,3 +16,6 @@ class NormalGenerator(base_generator.BaseGenerator):
 
     def generate_individual(self) -> str:
         return "".join(["1" if random.random() < 0.5 else "0" for _ in range(self._length)])
+
+    def _generate_bits(self, n: int) -> np.ndarray:
+        return self._rng.integers(0, 2, (n, self._length), dtype=np.uint8)
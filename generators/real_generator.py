@@ -1,3 +1,5 @@
+import numpy as np
+
 from core import fitness_functions, utils
 from generators import BaseGenerator
 
@@ -17,7 +19,7 @@ class RealGenerator(BaseGenerator):
         self._fitness_fn = fitness_fn
         self._low_range = low_range
         self._high_range = high_range
-        self._dist = utils.generate_norm_dist(self._low_range, self._high_range, n)
+        self._dist = utils.truncated_normal(self._low_range, self._high_range, n, self._rng)
         self._index = 0
 
     def generate_individual(self) -> str:
@@ -29,3 +31,14 @@ class RealGenerator(BaseGenerator):
         self._index += 1
 
         return item
+
+    def _generate_bits(self, n: int) -> np.ndarray:
+        """
+        Takes next n values of distribution and encodes all of them in one batch.
+        """
+        values = self._dist[self._index:self._index + n]
+        args = np.round(self._fitness_fn.get_x_array(values, self._rng), 2)
+
+        self._index += n
+
+        return self._fitness_fn.encode_array(args)
@@ -1,5 +1,7 @@
 from .function import Function
 from .individual import Individual
+from .genotype_index import GenotypeIndex
 from .population import Population
+from .bit_population import BitPopulation
 
-__all__ = ['Function', 'Individual', 'Population']
+__all__ = ['Function', 'Individual', 'GenotypeIndex', 'Population', 'BitPopulation']
@@ -0,0 +1,349 @@
+import typing
+
+import numpy as np
+
+import models
+from models.fitness_aggregates import FitnessAggregates
+from models.genotype_index import GenotypeIndex
+
+# number of set bits for every possible byte value
+POPCOUNT_TABLE: np.ndarray = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def pack(bits: np.ndarray) -> np.ndarray:
+    """
+    Packs (n, length) matrix of 0/1 values into (n, ceil(length / 8)) uint8 rows.
+    """
+    return np.packbits(np.asarray(bits, dtype=np.uint8), axis=1)
+
+
+def unpack(genes: np.ndarray, length: int) -> np.ndarray:
+    """
+    Unpacks (n, ceil(length / 8)) uint8 rows into (n, length) matrix of 0/1 values.
+    """
+    return np.unpackbits(genes, axis=1, count=length)
+
+
+def to_bits(genotypes: typing.List[str]) -> np.ndarray:
+    """
+    Converts list of bit strings (e.g. ['0101', '1100']) into (n, length) matrix of 0/1 values.
+    """
+    length = len(genotypes[0])
+    raw = np.frombuffer("".join(genotypes).encode("ascii"), dtype=np.uint8)
+
+    return (raw - ord("0")).reshape(len(genotypes), length)
+
+
+def from_genotypes(genotypes: typing.List[str]) -> np.ndarray:
+    """
+    Converts list of bit strings (e.g. ['0101', '1100']) into packed uint8 rows.
+    """
+    return pack(to_bits(genotypes))
+
+
+def to_genotypes(bits: np.ndarray) -> typing.List[str]:
+    """
+    Converts (n, length) matrix of 0/1 values into list of bit strings.
+    """
+    length = bits.shape[1]
+    rows = (bits + ord("0")).astype(np.uint8).tobytes().decode("ascii")
+    return [rows[i:i + length] for i in range(0, len(rows), length)]
+
+
+def to_keys(genes: np.ndarray) -> np.ndarray:
+    """
+    Views packed rows as 1-D array of hashable fixed-size byte records (one per row).
+    """
+    genes = np.ascontiguousarray(genes)
+    return genes.view(np.dtype((np.void, genes.shape[1]))).ravel()
+
+
+def to_ints(genes: np.ndarray, length: int) -> np.ndarray:
+    """
+    Reads each packed row (up to 64 bits) as big-endian binary integer.
+    """
+    n_bytes = genes.shape[1]
+    weights = np.uint64(1) << (np.uint64(8) * np.arange(n_bytes - 1, -1, -1, dtype=np.uint64))
+    ints = genes.astype(np.uint64) @ weights
+
+    return (ints >> np.uint64(8 * n_bytes - length)).astype(np.int64)
+
+
+def popcount(genes: np.ndarray) -> np.ndarray:
+    """
+    Counts set bits in each packed row (table-driven, one lookup per byte).
+    """
+    return POPCOUNT_TABLE[genes].sum(axis=1, dtype=np.int64)
+
+
+class BitPopulation:
+    """
+    Population stored as one contiguous packed bit matrix with a parallel fitness vector.
+    Mirrors models.Population interface, so it can be used by GeneticAlgorithm as a drop-in backend.
+    """
+
+    def __init__(
+            self, genes: np.ndarray, fitness: np.ndarray, length: int,
+            scaled_fitness_arr: typing.Union[np.ndarray, None] = None,
+            row_keys: typing.Union[np.ndarray, None] = None,
+            genotype_index: typing.Union[GenotypeIndex, None] = None,
+            parents: typing.Union[np.ndarray, None] = None,
+    ):
+        self._genes: np.ndarray = genes
+        self._fitness: np.ndarray = np.asarray(fitness, dtype=np.float64)
+        self._length: int = length
+        self._scaled_fitness_arr: typing.Union[np.ndarray, None] = scaled_fitness_arr
+        self._row_keys: typing.Union[np.ndarray, None] = row_keys
+        self._genotype_index: typing.Union[GenotypeIndex, None] = genotype_index
+        # index of each individual's parent in the population it was selected from, -1 if changed since
+        self._parents: typing.Union[np.ndarray, None] = parents
+
+        self._aggregates: typing.Union[FitnessAggregates, None] = None
+        self._scaled_fitness: typing.Union[float, None] = None
+
+    @classmethod
+    def from_genotypes(cls, genotypes: typing.List[str], fitness: typing.Iterable[float]) -> "BitPopulation":
+        return cls(from_genotypes(genotypes), np.fromiter(fitness, dtype=np.float64), len(genotypes[0]))
+
+    @property
+    def genes(self) -> np.ndarray:
+        return self._genes
+
+    @property
+    def bits(self) -> np.ndarray:
+        return unpack(self._genes, self._length)
+
+    @property
+    def length(self) -> int:
+        return self._length
+
+    @property
+    def fitness(self) -> np.ndarray:
+        return self._fitness
+
+    @property
+    def individuals(self) -> typing.List[models.Individual]:
+        scaled = self.scaled_fitness_arr
+        return [
+            models.Individual(genotype, fitness, scaled_fitness)
+            for genotype, fitness, scaled_fitness in zip(self.genotypes(), self._fitness, scaled)
+        ]
+
+    @property
+    def row_keys(self) -> np.ndarray:
+        """
+        Genotype key (packed row bytes) of every individual, computed once per row.
+        """
+        if self._row_keys is None:
+            self._row_keys = np.empty(len(self), dtype=object)
+            self._row_keys[:] = self.keys().tolist()
+
+        return self._row_keys
+
+    @property
+    def parents(self) -> typing.Union[np.ndarray, None]:
+        return self._parents
+
+    @property
+    def genotype_index(self) -> GenotypeIndex:
+        if self._genotype_index is None:
+            self._genotype_index = GenotypeIndex.from_keys(self.row_keys)
+
+        return self._genotype_index
+
+    @property
+    def aggregates(self) -> FitnessAggregates:
+        if self._aggregates is None:
+            self._aggregates = FitnessAggregates(self._fitness)
+
+        return self._aggregates
+
+    @property
+    def score(self) -> float:
+        return self.aggregates.score
+
+    @property
+    def avg_score(self) -> float:
+        return self.aggregates.avg
+
+    @property
+    def best_score(self) -> float:
+        return self.aggregates.max
+
+    @property
+    def std_score(self) -> float:
+        return self.aggregates.std
+
+    @property
+    def fitness_arr(self) -> np.ndarray:
+        return self._fitness
+
+    @property
+    def scaled_fitness_arr(self) -> np.ndarray:
+        if self._scaled_fitness_arr is None:
+            return self._fitness
+
+        return self._scaled_fitness_arr
+
+    @scaled_fitness_arr.setter
+    def scaled_fitness_arr(self, value: np.ndarray):
+        self._scaled_fitness_arr = np.asarray(value, dtype=np.float64)
+        self._scaled_fitness = None
+
+    @property
+    def scaled_fitness(self) -> float:
+        if self._scaled_fitness is None:
+            self._scaled_fitness = float(self.scaled_fitness_arr.sum())
+        return self._scaled_fitness
+
+    def genotype(self, index: int) -> str:
+        return to_genotypes(unpack(self._genes[index:index + 1], self._length))[0]
+
+    def genotypes(self) -> typing.List[str]:
+        return to_genotypes(self.bits)
+
+    def keys(self) -> np.ndarray:
+        """
+        Returns genotypes as 1-D array of hashable fixed-size byte records (one per row).
+        """
+        return to_keys(self._genes)
+
+    def take(self, indices: np.ndarray) -> "BitPopulation":
+        indices = np.asarray(indices, dtype=np.int64)
+        scaled = None if self._scaled_fitness_arr is None else self._scaled_fitness_arr[indices]
+        row_keys = self.row_keys
+        genotype_index = GenotypeIndex.from_selection(lambda parents: row_keys[parents], indices, len(self))
+
+        return BitPopulation(
+            self._genes[indices], self._fitness[indices], self._length, scaled,
+            row_keys=row_keys[indices], genotype_index=genotype_index, parents=indices.copy()
+        )
+
+    def replace(self, indices: np.ndarray, genes: np.ndarray, fitness: typing.Iterable[float]):
+        """
+        Overwrites rows at given indices with new genes and their fitness, fitness aggregates are updated by the change.
+        """
+        old_fitness = self._fitness[indices]
+        self._genes[indices] = genes
+        self._fitness[indices] = np.fromiter(fitness, dtype=np.float64, count=len(indices))
+        if self._aggregates is not None:
+            self._aggregates.update(indices, old_fitness, self._fitness[indices], self._fitness)
+
+        if self._row_keys is not None:
+            new_keys = to_keys(genes).tolist()
+            if self._genotype_index is not None:
+                self._genotype_index.replace(self._row_keys[indices], new_keys)
+            self._row_keys[indices] = new_keys
+        else:
+            self._genotype_index = None
+
+        if self._parents is not None:
+            self._parents[indices] = -1
+
+        self._scaled_fitness = None
+
+    def sort(self):
+        order = np.argsort(self._fitness, kind="stable")
+        self._genes = self._genes[order]
+        self._fitness = self._fitness[order]
+        if self._row_keys is not None:
+            self._row_keys = self._row_keys[order]
+        if self._parents is not None:
+            self._parents = self._parents[order]
+        if self._scaled_fitness_arr is not None:
+            self._scaled_fitness_arr = self._scaled_fitness_arr[order]
+        if self._aggregates is not None:
+            self._aggregates.sorted()
+
+    def get_fittest(self, n: int) -> typing.List[models.Individual]:
+        return [
+            models.Individual(self.genotype(index), float(self._fitness[index]))
+            for index in range(len(self) - n, len(self))
+        ]
+
+    def argsort(self) -> np.ndarray:
+        """
+        Order of individuals by fitness (the one sort() would apply), for consumers that need it.
+        """
+        return np.argsort(self._fitness, kind="stable")
+
+    def best_index(self) -> int:
+        """
+        Index of the fittest individual, the last one of equally fit (same as after sort).
+        """
+        return self.aggregates.argmax
+
+    def get_best(self) -> models.Individual:
+        index = self.best_index()
+        return models.Individual(self.genotype(index), float(self._fitness[index]))
+
+    def is_zero(self, index: int) -> bool:
+        return not self._genes[index].any()
+
+    def count(self, individual: models.Individual) -> int:
+        return self.genotype_index.count(from_genotypes([individual.genotype])[0].tobytes())
+
+    def count_top_copies(self) -> int:
+        """
+        Number of consecutive copies of the last (fittest after sort) individual at the end of population.
+        """
+        same = (self._genes == self._genes[-1]).all(axis=1)[::-1]
+        return int(same.argmin()) if not same.all() else len(same)
+
+    def count_best_copies(self) -> int:
+        """
+        Number of copies of the fittest individual anywhere in population, doesn't need sort.
+        """
+        return int((self._genes == self._genes[self.best_index()]).all(axis=1).sum())
+
+    def count_present_in(self, other: "BitPopulation") -> int:
+        """
+        Number of individuals of this population whose genotype is present in other population.
+        """
+        present = other.genotype_index
+        return sum(copies for key, copies in self.genotype_index.items() if key in present)
+
+    def count_parents_present(self, child: "BitPopulation") -> int:
+        """
+        Same as count_present_in(child), but uses child's lineage: genotypes present in child
+        are the ones of its distinct selected parents plus the ones of its changed individuals.
+        """
+        selected = np.bincount(child.parents[child.parents >= 0], minlength=len(self))
+        keys = set(self.row_keys[np.flatnonzero(selected)])
+        keys.update(key for key in child.row_keys[child.parents < 0] if key in self.genotype_index)
+
+        return sum(self.genotype_index.count(key) for key in keys)
+
+    def optimal(self, optimal: str) -> bool:
+        if self.convergence():
+            if self.genotype(0) == optimal:
+                return True
+
+        return False
+
+    def convergence(self) -> bool:
+        return self.genotype_index.distinct == 1
+
+    def unique_count(self) -> int:
+        return self.genotype_index.distinct
+
+    def homogenity(self, threshold=0.99) -> bool:
+        unique_to_all_ratio = self.unique_count() / len(self)
+        homogenity_score = 1.0 - unique_to_all_ratio
+        return homogenity_score >= threshold
+
+    def invalidate(self):
+        self._aggregates = None
+        self._scaled_fitness = None
+
+    def __repr__(self):
+        return f"BitPopulation(individuals={len(self)}, length={self._length}, total_score={self.score})"
+
+    def __contains__(self, item) -> bool:
+        return self.count(item) > 0
+
+    def __eq__(self, other) -> bool:
+        return self._length == other.length and np.array_equal(self._genes, other.genes)
+
+    def __len__(self) -> int:
+        return self._genes.shape[0]
@@ -0,0 +1,86 @@
+import math
+import typing
+
+import numpy as np
+
+
+class FitnessAggregates:
+    """
+    Running aggregates of population fitness: sum and sum of squares, max and its index
+    (the last one of equally fit, same as after sort). Change of k individuals updates them in O(k).
+    Sums are kept as deviations from the mean at build time, so variance doesn't lose precision.
+    """
+
+    def __init__(self, fitness: typing.Sequence[float]):
+        fitness = np.asarray(fitness, dtype=np.float64)
+        deviations = fitness - fitness.mean()
+
+        self._n: int = len(fitness)
+        self._shift: float = float(fitness.mean())
+        self._sum: float = float(deviations.sum())
+        self._sum_sq: float = float(deviations @ deviations)
+        self._argmax: int = 0
+        self._max: float = -math.inf
+        self._find_max(fitness)
+
+    def _find_max(self, fitness: np.ndarray):
+        self._argmax = self._n - 1 - int(np.argmax(fitness[::-1]))
+        self._max = float(fitness[self._argmax])
+
+    @property
+    def score(self) -> float:
+        return self._shift * self._n + self._sum
+
+    @property
+    def avg(self) -> float:
+        return self._shift + self._sum / self._n
+
+    @property
+    def std(self) -> float:
+        mean = self._sum / self._n
+        return math.sqrt(max(self._sum_sq / self._n - mean * mean, 0.0))
+
+    @property
+    def max(self) -> float:
+        return self._max
+
+    @property
+    def argmax(self) -> int:
+        return self._argmax
+
+    def update(
+            self, indices: typing.Sequence[int], old: typing.Sequence[float], new: typing.Sequence[float],
+            fitness: typing.Sequence[float]
+    ):
+        """
+        Accounts change of fitness at given indices.
+        :param indices: Indices of changed individuals
+        :param old: Their fitness before the change
+        :param new: Their fitness after the change
+        :param fitness: Whole fitness after the change, read only if the fittest individual got worse
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        old = np.asarray(old, dtype=np.float64)
+        new = np.asarray(new, dtype=np.float64)
+        if not len(indices):
+            return
+
+        old_deviations = old - self._shift
+        new_deviations = new - self._shift
+        self._sum += float(new_deviations.sum() - old_deviations.sum())
+        self._sum_sq += float(new_deviations @ new_deviations - old_deviations @ old_deviations)
+
+        new_max = float(new.max())
+        if new_max > self._max:
+            self._max = new_max
+            self._argmax = int(indices[new == new_max].max())
+        elif self._argmax in indices and new[indices == self._argmax][0] < self._max:
+            self._find_max(np.asarray(fitness, dtype=np.float64))
+        elif new_max == self._max:
+            self._argmax = max(self._argmax, int(indices[new == new_max].max()))
+
+    def sorted(self):
+        """
+        Accounts sort of population by fitness: sums don't change, the fittest individual is the last one.
+        """
+        self._argmax = self._n - 1
@@ -1,9 +1,13 @@
 import abc
 
+import numpy as np
+
 
 class Function(abc.ABC):
     def __call__(self, args):
-        if isinstance(args, list):
+        if isinstance(args, np.ndarray):
+            return self._f_array(args)
+        elif isinstance(args, list):
             return [self._f(x) for x in args]
         else:
             return self._f(args)
@@ -11,3 +15,9 @@ class Function(abc.ABC):
     @abc.abstractmethod
     def _f(self, arg):
         raise NotImplementedError
+
+    def _f_array(self, args: np.ndarray) -> np.ndarray:
+        """
+        Function of the whole vector, subclasses override it with vector operations.
+        """
+        return np.fromiter((self._f(arg) for arg in args), dtype=np.float64, count=len(args))
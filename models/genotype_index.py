@@ -0,0 +1,71 @@
+import collections
+import typing
+
+import numpy as np
+
+
+class GenotypeIndex:
+    """
+    Multiplicity index of population genotypes: genotype key -> number of its copies in population.
+    Keys are any hashable genotype representation (bit strings or packed row bytes).
+    """
+
+    def __init__(self, counts: typing.Union[typing.Dict[typing.Hashable, int], None] = None):
+        self._counts: typing.Dict[typing.Hashable, int] = counts or {}
+
+    @classmethod
+    def from_keys(cls, keys: typing.Iterable[typing.Hashable]) -> "GenotypeIndex":
+        return cls(dict(collections.Counter(keys)))
+
+    @classmethod
+    def from_selection(
+            cls, keys: typing.Callable[[np.ndarray], typing.Iterable[typing.Hashable]], indices: np.ndarray, n: int
+    ) -> "GenotypeIndex":
+        """
+        Builds index of population selected from parents by indices.
+        Costs one pass over distinct selected parents instead of hashing every selected genotype.
+        :param keys: Maps array of parent indices to their genotype keys
+        :param indices: Indices of selected parents
+        :param n: Number of parents
+        """
+        copies = np.bincount(np.asarray(indices, dtype=np.int64), minlength=n)
+        parents = np.flatnonzero(copies)
+
+        index = cls()
+        for key, count in zip(keys(parents), copies[parents].tolist()):
+            index.add(key, count)
+
+        return index
+
+    @property
+    def distinct(self) -> int:
+        return len(self._counts)
+
+    def add(self, key: typing.Hashable, copies: int = 1):
+        self._counts[key] = self._counts.get(key, 0) + copies
+
+    def remove(self, key: typing.Hashable, copies: int = 1):
+        left = self._counts[key] - copies
+
+        if left:
+            self._counts[key] = left
+        else:
+            del self._counts[key]
+
+    def replace(self, old_keys: typing.Iterable[typing.Hashable], new_keys: typing.Iterable[typing.Hashable]):
+        for key in old_keys:
+            self.remove(key)
+        for key in new_keys:
+            self.add(key)
+
+    def count(self, key: typing.Hashable) -> int:
+        return self._counts.get(key, 0)
+
+    def items(self) -> typing.ItemsView[typing.Hashable, int]:
+        return self._counts.items()
+
+    def __contains__(self, key: typing.Hashable) -> bool:
+        return key in self._counts
+
+    def __len__(self) -> int:
+        return self.distinct
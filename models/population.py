@@ -3,15 +3,22 @@ import typing
 import numpy as np
 
 import models
+from models.fitness_aggregates import FitnessAggregates
+from models.genotype_index import GenotypeIndex
 
 
 class Population:
-    def __init__(self, individuals: typing.List[models.Individual]):
+    def __init__(
+            self, individuals: typing.List[models.Individual],
+            genotype_index: typing.Union[GenotypeIndex, None] = None,
+            parents: typing.Union[np.ndarray, None] = None,
+    ):
         self._individuals: typing.List[models.Individual] = individuals
+        self._genotype_index: typing.Union[GenotypeIndex, None] = genotype_index
+        # index of each individual's parent in the population it was selected from, -1 if changed since
+        self._parents: typing.Union[np.ndarray, None] = parents
 
-        self._score: typing.Union[float, None] = None
-        self._avg_score: typing.Union[float, None] = None
-        self._std_score: typing.Union[float, None] = None
+        self._aggregates: typing.Union[FitnessAggregates, None] = None
         self._fitness_arr: typing.Union[typing.List[float], None] = None
         self._scaled_fitness = None
 
@@ -20,29 +27,38 @@ class Population:
         return self._individuals
 
     @property
-    def score(self) -> float:
-        if self._score is None:
-            self._score = sum(self.fitness_arr)
+    def parents(self) -> typing.Union[np.ndarray, None]:
+        return self._parents
+
+    @property
+    def genotype_index(self) -> GenotypeIndex:
+        if self._genotype_index is None:
+            self._genotype_index = GenotypeIndex.from_keys(individual.genotype for individual in self._individuals)
 
-        return self._score
+        return self._genotype_index
 
     @property
-    def avg_score(self) -> float:
-        if self._avg_score is None:
-            self._avg_score = np.mean(self.fitness_arr)
+    def aggregates(self) -> FitnessAggregates:
+        if self._aggregates is None:
+            self._aggregates = FitnessAggregates(self.fitness_arr)
+
+        return self._aggregates
+
+    @property
+    def score(self) -> float:
+        return self.aggregates.score
 
-        return self._avg_score
+    @property
+    def avg_score(self) -> float:
+        return self.aggregates.avg
 
     @property
     def best_score(self) -> float:
-        return np.max(self.fitness_arr)
+        return self.aggregates.max
 
     @property
     def std_score(self) -> float:
-        if self._std_score is None:
-            self._std_score = np.std(self.fitness_arr)
-
-        return self._std_score
+        return self.aggregates.std
 
     @property
     def fitness_arr(self) -> typing.List[float]:
@@ -51,6 +67,10 @@ class Population:
 
         return self._fitness_arr
 
+    @property
+    def scaled_fitness_arr(self) -> typing.List[float]:
+        return [individual.scaled_fitness for individual in self._individuals]
+
     @property
     def scaled_fitness(self) -> float:
         if self._scaled_fitness is None:
@@ -58,22 +78,104 @@ class Population:
         return self._scaled_fitness
 
     def sort(self):
-        self._individuals: typing.List[models.Individual] = sorted(
-            self._individuals, key=lambda x: x.fitness
-        )
+        order = sorted(range(len(self._individuals)), key=lambda i: self._individuals[i].fitness)
+        self._individuals = [self._individuals[i] for i in order]
+        if self._parents is not None:
+            self._parents = self._parents[order]
+        if self._fitness_arr is not None:
+            self._fitness_arr = [self._fitness_arr[i] for i in order]
+        if self._aggregates is not None:
+            self._aggregates.sorted()
 
     def get_fittest(self, n: int) -> typing.List[models.Individual]:
         return self._individuals[-n:]
 
+    def argsort(self) -> np.ndarray:
+        """
+        Order of individuals by fitness (the one sort() would apply), for consumers that need it.
+        """
+        return np.argsort(self.fitness_arr, kind="stable")
+
+    def best_index(self) -> int:
+        """
+        Index of the fittest individual, the last one of equally fit (same as after sort).
+        """
+        return self.aggregates.argmax
+
+    def get_best(self) -> models.Individual:
+        return self._individuals[self.best_index()]
+
+    def take(self, indices: typing.Iterable[int]) -> "Population":
+        indices = np.asarray(indices, dtype=np.int64)
+        genotype_index = GenotypeIndex.from_selection(
+            lambda parents: (self._individuals[index].genotype for index in parents), indices, len(self)
+        )
+        return Population([self._individuals[index] for index in indices], genotype_index, indices.copy())
+
+    def replace(self, indices: typing.Iterable[int], individuals: typing.List[models.Individual]):
+        """
+        Puts new individuals at given indices, fitness aggregates are updated by their change.
+        """
+        old_fitness = [self._individuals[index].fitness for index in indices]
+
+        for index, individual in zip(indices, individuals):
+            if self._genotype_index is not None:
+                self._genotype_index.remove(self._individuals[index].genotype)
+                self._genotype_index.add(individual.genotype)
+            self._individuals[index] = individual
+            if self._parents is not None:
+                self._parents[index] = -1
+            if self._fitness_arr is not None:
+                self._fitness_arr[index] = individual.fitness
+
+        if self._aggregates is not None:
+            self._aggregates.update(
+                indices, old_fitness, [individual.fitness for individual in individuals], self._fitness_arr
+            )
+        self._scaled_fitness = None
+
+    def is_zero(self, index: int) -> bool:
+        return self._individuals[index].is_zero()
+
     def count(self, individual: models.Individual) -> int:
+        return self.genotype_index.count(individual.genotype)
+
+    def count_top_copies(self) -> int:
+        best = self._individuals[-1]
         counter = 0
 
-        for i in self._individuals:
-            if i == individual:
+        for individual in self._individuals[::-1]:
+            if individual == best:
                 counter += 1
+                continue
+            break
 
         return counter
 
+    def count_best_copies(self) -> int:
+        """
+        Number of copies of the fittest individual anywhere in population, doesn't need sort.
+        """
+        return self.genotype_index.count(self.get_best().genotype)
+
+    def count_present_in(self, other: "Population") -> int:
+        present = other.genotype_index
+        return sum(copies for genotype, copies in self.genotype_index.items() if genotype in present)
+
+    def count_parents_present(self, child: "Population") -> int:
+        """
+        Same as count_present_in(child), but uses child's lineage: genotypes present in child
+        are the ones of its distinct selected parents plus the ones of its changed individuals.
+        """
+        selected = np.bincount(child.parents[child.parents >= 0], minlength=len(self))
+        genotypes = {self._individuals[index].genotype for index in np.flatnonzero(selected)}
+        genotypes.update(
+            child.individuals[index].genotype for index in np.flatnonzero(child.parents < 0)
+            if child.individuals[index].genotype in self.genotype_index
+        )
+
+        return sum(self.genotype_index.count(genotype) for genotype in genotypes)
+
     def optimal(self, optimal: str) -> bool:
         if self.convergence():
             if self._individuals[0].genotype == optimal:
@@ -82,23 +184,18 @@ class Population:
         return False
 
     def convergence(self) -> bool:
-        return len(set(self._individuals)) == 1
-        # kek = sorted([individual.genotype for individual in self._individuals])
-        # setted = set(
-        #     kek
-        # )
-        # return len(setted) == 1
+        return self.genotype_index.distinct == 1
+
+    def unique_count(self) -> int:
+        return self.genotype_index.distinct
 
     def homogenity(self, threshold=0.99) -> bool:
-        unique_individuals = len(set([individual.genotype for individual in self._individuals]))
-        unique_to_all_ratio = unique_individuals / len(self._individuals)
+        unique_to_all_ratio = self.unique_count() / len(self._individuals)
         homogenity_score = 1.0 - unique_to_all_ratio
         return homogenity_score >= threshold
 
     def invalidate(self):
-        self._score = None
-        self._avg_score = None
-        self._std_score = None
+        self._aggregates = None
         self._fitness_arr = None
         self._scaled_fitness = None
 
@@ -106,7 +203,7 @@ class Population:
         return f"Population(individuals={len(self._individuals)}, total_score={self.score})"
 
     def __contains__(self, item) -> bool:
-        return item in self._individuals
+        return item.genotype in self.genotype_index
 
     def __eq__(self, other) -> bool:
         return self._individuals == other.individuals
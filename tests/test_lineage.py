@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import models
+from core import fitness_functions, genetic_algorithm, scale_functions, selection_algorithms
+from models import bit_population
+
+N, LENGTH = 60, 8
+
+
+def make_population(backend: str, bits: np.ndarray):
+    fitness = bits.sum(axis=1).astype(np.float64)
+    if backend == "numpy":
+        return models.BitPopulation(bit_population.pack(bits), fitness, LENGTH)
+    return models.Population([
+        models.Individual(genotype, value)
+        for genotype, value in zip(bit_population.to_genotypes(bits), fitness.tolist())
+    ])
+
+
+def mutate(population, indices: np.ndarray, rng: np.random.Generator):
+    bits = rng.integers(0, 2, (len(indices), LENGTH), dtype=np.uint8)
+    fitness = bits.sum(axis=1).astype(np.float64)
+    if isinstance(population, models.BitPopulation):
+        population.replace(indices, bit_population.pack(bits), fitness)
+    else:
+        population.replace(indices, [
+            models.Individual(genotype, value)
+            for genotype, value in zip(bit_population.to_genotypes(bits), fitness.tolist())
+        ])
+
+
+@pytest.mark.parametrize("backend", ["numpy", "object"])
+def test_count_parents_present_matches_genotype_count(backend):
+    rng = np.random.default_rng(0)
+
+    for _ in range(200):
+        # few distinct genotypes, so copies and coincidences are common
+        parent = make_population(backend, rng.integers(0, 2, (N, LENGTH), dtype=np.uint8) & rng.integers(0, 2, LENGTH))
+        child = parent.take(rng.integers(0, N, N))
+        mutate(child, rng.choice(N, int(rng.integers(0, N)), replace=False), rng)
+
+        assert parent.count_parents_present(child) == parent.count_present_in(child)
+
+
+@pytest.mark.parametrize("backend", ["numpy", "object"])
+@pytest.mark.parametrize("crossover_type", ["one_point", "uniform"])
+def test_crossover_lineage_keeps_rr(backend, crossover_type, monkeypatch):
+    """
+    RR of runs with crossover is the same whether it's counted by lineage or by hashing every genotype.
+    """
+    def run():
+        rng = np.random.default_rng(5)
+        base = (rng.random((100, 20)) < 0.3).astype(np.uint8)
+        algo = genetic_algorithm.GeneticAlgorithm(
+            base_population=base,
+            fitness_function=fitness_functions.FH(),
+            scale_function=scale_functions.LinearScaling(1, 1),
+            selection_algo=selection_algorithms.my_sus,
+            optimal="0" * 20,
+            use_crossingover=True,
+            crossover_type=crossover_type,
+            max_iteration=150,
+            history_size=0,
+            backend=backend,
+            seed=3,
+        )
+        algo.fit()
+        return algo.stats
+
+    with_lineage = run()
+    monkeypatch.setattr(genetic_algorithm.GeneticAlgorithm, "_crossover_parents", lambda self, *args: None)
+    without_lineage = run()
+
+    assert with_lineage == without_lineage
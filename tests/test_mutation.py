@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from core import mutation
+from models import bit_population
+
+N, LENGTH = 200, 30
+
+
+def flips_per_gene(operator, rate: float, generations: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Number of times each gene of (N, LENGTH) zero population flipped over independent generations.
+    """
+    counts = np.zeros((N, LENGTH), dtype=np.int64)
+    genes = np.zeros((N, (LENGTH + 7) // 8), dtype=np.uint8)
+
+    for _ in range(generations):
+        changed, mutated = operator(genes, LENGTH, rate, rng)
+        assert np.all(mutated.any(axis=1))
+        counts[changed] += bit_population.unpack(mutated, LENGTH)
+
+    return counts
+
+
+@pytest.mark.parametrize("mode", ["dense", "sparse"])
+@pytest.mark.parametrize("rate", [0.001, 0.05])
+def test_packed_flip_rate(mode, rate):
+    generations = 400
+    counts = flips_per_gene(mutation.PACKED_OPERATORS[mode], rate, generations, np.random.default_rng(0))
+    trials = N * LENGTH * generations
+
+    # total flips of Binomial(trials, rate) within 5 standard deviations
+    assert abs(counts.sum() - trials * rate) < 5 * np.sqrt(trials * rate * (1 - rate))
+    # every position is equally likely
+    per_column = counts.sum(axis=0)
+    expected = N * generations * rate
+    assert np.all(np.abs(per_column - expected) < 5 * np.sqrt(expected) + 1)
+
+
+@pytest.mark.parametrize("rate", [0.001, 0.05])
+def test_sparse_and_dense_flips_per_individual(rate):
+    """
+    Number of flips per individual follows Binomial(LENGTH, rate) in both modes.
+    """
+    generations = 400
+    per_individual = {}
+
+    for mode, operator in mutation.PACKED_OPERATORS.items():
+        rng = np.random.default_rng(1)
+        genes = np.zeros((N, (LENGTH + 7) // 8), dtype=np.uint8)
+        flips = []
+        for _ in range(generations):
+            changed, mutated = operator(genes, LENGTH, rate, rng)
+            row_flips = np.zeros(N, dtype=np.int64)
+            row_flips[changed] = bit_population.popcount(mutated)
+            flips.append(row_flips)
+        per_individual[mode] = np.concatenate(flips)
+
+    samples = N * generations
+    for flips in per_individual.values():
+        assert abs(flips.mean() - LENGTH * rate) < 5 * np.sqrt(LENGTH * rate * (1 - rate) / samples)
+        assert flips.var() == pytest.approx(LENGTH * rate * (1 - rate), rel=0.1)
+
+
+@pytest.mark.parametrize("mode", ["dense", "sparse"])
+def test_genotype_operators_match_packed(mode):
+    rng = np.random.default_rng(2)
+    genotypes = bit_population.to_genotypes(rng.integers(0, 2, (N, LENGTH), dtype=np.uint8))
+    genes = bit_population.from_genotypes(genotypes)
+
+    changed, mutated = mutation.GENOTYPE_OPERATORS[mode](genotypes, 0.05, np.random.default_rng(3))
+    packed_changed, packed_mutated = mutation.PACKED_OPERATORS[mode](genes, LENGTH, 0.05, np.random.default_rng(3))
+
+    assert np.array_equal(changed, packed_changed)
+    assert np.array_equal(bit_population.from_genotypes(mutated), packed_mutated)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from core import payloads
+
+
+def random_stats(rng: np.random.Generator, length: int) -> dict:
+    """
+    Run stats with a random subset of keys, as runs of different stats modes produce.
+    """
+    stats = {}
+    for key in payloads.INT_STATS:
+        if rng.random() < 0.7:
+            stats[key] = int(rng.integers(-1, 10_000))
+    for key in payloads.FLOAT_STATS:
+        if rng.random() < 0.7:
+            stats[key] = float(rng.normal() * 100)
+    if rng.random() < 0.7:
+        stats["F"] = "".join(rng.choice(["0", "1"], length))
+
+    return stats
+
+
+@pytest.mark.parametrize("length", [1, 8, 13, 100])
+def test_records_round_trip(length):
+    rng = np.random.default_rng(length)
+    runs_stats = [random_stats(rng, length) for _ in range(50)] + [{}]
+
+    records = payloads.to_records(runs_stats, length)
+
+    assert records.dtype == payloads.record_dtype(length)
+    assert payloads.from_records(records, length) == runs_stats
+
+
+def test_records_keep_types():
+    stats = payloads.from_records(payloads.to_records([{"NI": 3, "F_found": 2.5, "F": "0110"}], 4), 4)[0]
+
+    assert stats == {"NI": 3, "F_found": 2.5, "F": "0110"}
+    assert type(stats["NI"]) is int and type(stats["F_found"]) is float
+
+
+def test_send_array_round_trip(monkeypatch):
+    records = payloads.to_records([{"NI": index, "F": "1" * 20} for index in range(10)], 20)
+
+    # small arrays are sent as they are, large ones through shared memory
+    assert payloads.send_array(records) is records
+    monkeypatch.setattr(payloads, "SHARED_ARRAY_MIN_BYTES", 0)
+    payload = payloads.send_array(records, "test_payloads_round_trip")
+
+    assert isinstance(payload, payloads.SharedArray)
+    assert np.array_equal(payloads.receive_array(payload), records)
+    # received segment is removed, discarding it again is a no-op
+    payloads.discard_array(payload.name)
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from core import selection_algorithms
+
+
+def alias_distribution(prob: np.ndarray, alias: np.ndarray) -> np.ndarray:
+    """
+    Exact sampling probabilities of alias table: column itself with prob, its alias otherwise.
+    """
+    distribution = prob.copy()
+    np.add.at(distribution, alias, 1 - prob)
+    return distribution / len(prob)
+
+
+def random_weights(rng: np.random.Generator, n: int, kind: int) -> np.ndarray:
+    if kind == 0:
+        return rng.random(n)
+    if kind == 1:
+        # integer fitness hits the mean often, so some columns are exactly full
+        return rng.integers(0, 4, n).astype(np.float64)
+    if kind == 2:
+        return rng.exponential(size=n) ** 3
+    return np.where(rng.random(n) < 0.9, 0.0, rng.random(n) * 1000)
+
+
+@pytest.mark.parametrize("weights", [[3, 2, 0, 3], [1, 1, 1], [0, 0, 5], [2, 2, 0, 0], [1.0]])
+def test_alias_table_distribution_examples(weights):
+    weights = np.asarray(weights, dtype=np.float64)
+    prob, alias = selection_algorithms.alias_table(weights)
+
+    assert np.allclose(alias_distribution(prob, alias), weights / weights.sum())
+
+
+def test_alias_table_distribution_random():
+    rng = np.random.default_rng(0)
+
+    for case in range(20_000):
+        weights = random_weights(rng, int(rng.integers(1, 40)), case % 4)
+        prob, alias = selection_algorithms.alias_table(weights)
+        total = weights.sum()
+        expected = weights / total if total > 0 else np.full(len(weights), 1 / len(weights))
+
+        assert np.all((prob >= 0) & (prob <= 1 + 1e-12)), weights
+        assert np.allclose(alias_distribution(prob, alias), expected, atol=1e-12), weights
+
+
+def test_alias_indices_frequencies():
+    weights = np.array([3, 2, 0, 3], dtype=np.float64)
+    prob, alias = selection_algorithms.alias_table(weights)
+    indices = selection_algorithms.alias_indices(prob, alias, 400_000, np.random.default_rng(1))
+
+    assert np.allclose(np.bincount(indices, minlength=4) / len(indices), weights / weights.sum(), atol=0.005)